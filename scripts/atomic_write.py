@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Atomic file writes shared by the scripts that rewrite files in the repo.
+
+write() leaves a file untouched when its content is unchanged (same size
+and sha256), so codemod runs do not bump mtimes and trigger Vite/HMR
+rebuilds or file-watcher churn for pages they did not change. Changed
+content goes to a temp file in the same directory, is fsynced and then
+renamed over the target, so an interrupted run leaves either the old file
+or the new one, never a truncated page.
+
+The rename only becomes durable once the directory is fsynced. That is
+batched: a writer remembers the directories it touched and syncs each
+once in flush() (or on leaving a with block). Worker processes can skip
+the sync and let the parent call fsync_dirs() once for the whole run:
+
+    with AtomicWriter() as writer:
+        for path, text in pages:
+            writer.write(path, text)
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _encode(content, encoding):
+    return content.encode(encoding) if isinstance(content, str) else content
+
+def unchanged(path, data):
+    """True if path already holds exactly data (bytes); compares size first, then sha256."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return _digest(f.read()) == _digest(data)
+    except OSError:
+        return False
+
+def fsync_dirs(dirs):
+    """fsync each directory once so renames inside it are durable."""
+    for dirname in sorted(set(dirs)):
+        try:
+            fd = os.open(dirname, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass            # some filesystems do not support fsync on directories
+        finally:
+            os.close(fd)
+
+class AtomicWriter:
+    """Skip-if-unchanged, temp-file-and-rename writer with batched directory fsyncs."""
+
+    def __init__(self, sync_dirs=True):
+        self.sync_dirs = sync_dirs
+        self.pending_dirs = set()
+        self.written = []
+        self.skipped = []
+
+    def write(self, path, content, encoding='utf-8'):
+        """Write str or bytes content to path; returns False when the file already matched."""
+        data = _encode(content, encoding)
+        if unchanged(path, data):
+            self.skipped.append(path)
+            return False
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=dirname)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return True
+
+    def replace(self, tmp_path, path):
+        """Move an already-written temp file over path, keeping path's permissions."""
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_umask())
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.pending_dirs.add(os.path.dirname(os.path.abspath(path)))
+        self.written.append(path)
+
+    def flush(self):
+        if self.sync_dirs:
+            fsync_dirs(self.pending_dirs)
+        self.pending_dirs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        return False
+
+def _umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+def write_file(path, content, encoding='utf-8'):
+    """One-off atomic write; returns False when the file already matched."""
+    with AtomicWriter() as writer:
+        return writer.write(path, content, encoding)
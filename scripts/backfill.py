@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Backfill a column in keyset-paginated chunks, one short transaction each.
+
+A single UPDATE (or ALTER COLUMN ... TYPE ... USING) over a large table
+holds its locks and its WAL until the end, and a failure throws all of it
+away. migrations/phase112_enable_pgvector.sql is the motivating case: it
+converts ai_knowledge_base_vectors.embedding with USING NULL, which
+rewrites the table under an ACCESS EXCLUSIVE lock and discards every
+stored embedding. The kb_embedding job does the same change as
+expand / backfill / contract instead:
+
+  prepare   add embedding_vector vector(1536) next to the jsonb column
+            (catalog-only, no rewrite) and a trigger that keeps it in step
+            with embedding on every INSERT and UPDATE, so rows written
+            after their chunk has passed are not left stale
+  backfill  embedding_vector = embedding::text::vector, chunk by chunk
+  finalize  swap the columns by renaming them and drop the trigger, in one
+            short transaction (skipped if already swapped), then add NOT
+            NULL through a NOT VALID check that is validated without
+            blocking writes, and build the index concurrently
+
+Each chunk takes the next --chunk-size keys after the checkpoint, updates
+the rows among them that are still pending, and records the last key in
+a checkpoint table in the same transaction, so a crashed or interrupted
+run resumes exactly where it stopped. Between chunks the engine sleeps
+--sleep seconds, resizes chunks towards --target-ms, and waits while
+replication lag is above --max-lag-mb, so WAL is produced at a steady rate
+replicas can follow. Progress and an ETA are printed as it goes.
+
+  python scripts/backfill.py kb_embedding                  # prepare + backfill
+  python scripts/backfill.py kb_embedding --finalize
+  python scripts/backfill.py --name webhook_event_kind --table line_webhook_events \\
+      --prepare "ALTER TABLE line_webhook_events ADD COLUMN IF NOT EXISTS event_kind text" \\
+      --set "event_kind = raw_payload->>'type'" --pending "event_kind IS NULL"
+  python scripts/backfill.py --list-jsonb                  # jsonb columns in the Drizzle schema
+"""
+import argparse
+import glob
+import json
+import random
+import re
+import time
+
+import psycopg2
+
+from atomic_write import write_file
+from db_conn import connect, get_dsn
+from index_advisor import parse_tables
+
+CHUNK_SIZE = 1_000
+MIN_CHUNK = 100
+MAX_CHUNK = 50_000
+TARGET_MS = 500                 # chunk duration the adaptive sizing aims for
+LOCK_TIMEOUT_MS = 2_000
+CHUNK_TIMEOUT_MS = 30_000
+RETRIES = 5
+PROGRESS_EVERY = 2.0            # seconds between progress lines
+CHECKPOINT_TABLE = "backfill_checkpoints"
+
+# The jsonb embedding as vector(1536); anything but a 1536-element array gives NULL.
+KB_EMBEDDING_VECTOR = ("CASE WHEN jsonb_typeof({0}) = 'array' AND jsonb_array_length({0}) = 1536 "
+                       "THEN {0}::text::vector(1536) END")
+
+JOBS = {
+    'kb_embedding': {
+        'table': 'ai_knowledge_base_vectors',
+        'key': 'id',
+        'prepare': [
+            'CREATE EXTENSION IF NOT EXISTS vector',
+            'ALTER TABLE ai_knowledge_base_vectors ADD COLUMN IF NOT EXISTS embedding_vector vector(1536)',
+            'CREATE OR REPLACE FUNCTION ai_kb_vectors_sync_embedding() RETURNS trigger LANGUAGE plpgsql AS $$ '
+            f'BEGIN NEW.embedding_vector := {KB_EMBEDDING_VECTOR.format("NEW.embedding")}; RETURN NEW; END $$',
+            'DROP TRIGGER IF EXISTS ai_kb_vectors_sync_embedding ON ai_knowledge_base_vectors',
+            'CREATE TRIGGER ai_kb_vectors_sync_embedding BEFORE INSERT OR UPDATE OF embedding '
+            'ON ai_knowledge_base_vectors FOR EACH ROW EXECUTE FUNCTION ai_kb_vectors_sync_embedding()',
+        ],
+        # Embeddings that are not 1536-element arrays stay NULL and fail the finalize check.
+        'set': f"embedding_vector = {KB_EMBEDDING_VECTOR.format('embedding')}",
+        'pending': 'embedding_vector IS NULL',
+        # True once the swap has committed (embedding_vector is gone).
+        'swapped': "SELECT NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema = current_schema() "
+                   "AND table_name = 'ai_knowledge_base_vectors' AND column_name = 'embedding_vector')",
+        'swap': [
+            'DROP TRIGGER IF EXISTS ai_kb_vectors_sync_embedding ON ai_knowledge_base_vectors',
+            'DROP FUNCTION IF EXISTS ai_kb_vectors_sync_embedding()',
+            'ALTER TABLE ai_knowledge_base_vectors RENAME COLUMN embedding TO embedding_jsonb',
+            'ALTER TABLE ai_knowledge_base_vectors ALTER COLUMN embedding_jsonb DROP NOT NULL',
+            'ALTER TABLE ai_knowledge_base_vectors RENAME COLUMN embedding_vector TO embedding',
+        ],
+        'finalize': [
+            'ALTER TABLE ai_knowledge_base_vectors DROP CONSTRAINT IF EXISTS ai_kb_vectors_embedding_not_null',
+            'ALTER TABLE ai_knowledge_base_vectors ADD CONSTRAINT ai_kb_vectors_embedding_not_null '
+            'CHECK (embedding IS NOT NULL) NOT VALID',
+            'ALTER TABLE ai_knowledge_base_vectors VALIDATE CONSTRAINT ai_kb_vectors_embedding_not_null',
+            # PostgreSQL 12+ skips the table scan when a valid CHECK proves NOT NULL
+            'ALTER TABLE ai_knowledge_base_vectors ALTER COLUMN embedding SET NOT NULL',
+            'ALTER TABLE ai_knowledge_base_vectors DROP CONSTRAINT ai_kb_vectors_embedding_not_null',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ai_kb_vectors_embedding_hnsw '
+            'ON ai_knowledge_base_vectors USING hnsw (embedding vector_cosine_ops)',
+        ],
+    },
+}
+
+CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS "{table}" (
+  job text PRIMARY KEY,
+  last_key bigint NOT NULL,
+  rows_updated bigint NOT NULL DEFAULT 0,
+  finished boolean NOT NULL DEFAULT false,
+  updated_at timestamptz NOT NULL DEFAULT now()
+)
+"""
+
+CHUNK_SQL = """
+WITH chunk AS (
+  SELECT {key} AS k FROM {table} WHERE {key} > %(after)s ORDER BY {key} LIMIT %(limit)s
+), updated AS (
+  UPDATE {table} AS t SET {set} FROM chunk WHERE t.{key} = chunk.k AND ({pending}) RETURNING 1
+)
+SELECT (SELECT max(k) FROM chunk), (SELECT count(*) FROM chunk), (SELECT count(*) FROM updated)
+"""
+
+# CREATE INDEX CONCURRENTLY that was cancelled or failed leaves an INVALID index behind,
+# which IF NOT EXISTS would then skip.
+CONCURRENT_INDEX_RE = re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.I)
+INVALID_INDEX_SQL = "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)"
+
+LAG_SQL = "SELECT coalesce(max(pg_wal_lsn_diff(pg_current_wal_lsn(), replay_lsn)), 0) FROM pg_stat_replication"
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+class Backfill:
+    """Runs one job's chunks with a transactional checkpoint, throttling and progress output."""
+
+    def __init__(self, conn, name, job, chunk_size=CHUNK_SIZE, sleep=0.0, target_ms=TARGET_MS,
+                 max_lag_bytes=None, checkpoint_table=CHECKPOINT_TABLE):
+        self.conn = conn
+        self.name = name
+        self.job = job
+        self.chunk_size = chunk_size
+        self.sleep = sleep
+        self.target_ms = target_ms
+        self.max_lag_bytes = max_lag_bytes
+        self.checkpoint_table = checkpoint_table
+        self.sql = CHUNK_SQL.format(key=job.get('key', 'id'), table=job['table'], set=job['set'],
+                                    pending=job.get('pending') or 'true')
+        self.chunks = []
+
+    def execute_all(self, statements, autocommit=False):
+        """Run setup/teardown statements with a lock_timeout.
+
+        Without autocommit they run as one transaction that is rolled back
+        if any of them fails; with it each statement commits on its own,
+        and an INVALID index left by an earlier CREATE INDEX CONCURRENTLY
+        IF NOT EXISTS is dropped before that statement is retried.
+        """
+        self.conn.autocommit = autocommit
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(f"SET lock_timeout = '{LOCK_TIMEOUT_MS}ms'")
+                for statement in statements:
+                    index = CONCURRENT_INDEX_RE.match(statement.strip()) if autocommit else None
+                    if index:
+                        cur.execute(INVALID_INDEX_SQL, (index.group(1),))
+                        row = cur.fetchone()
+                        if row and row[0]:
+                            print(f"  dropping INVALID index {index.group(1)} left by an earlier run")
+                            cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.group(1)}"')
+                    t0 = time.perf_counter()
+                    cur.execute(statement)
+                    print(f"  {(time.perf_counter() - t0) * 1000:>8.1f} ms  {' '.join(statement.split())[:100]}")
+                cur.execute("RESET lock_timeout")
+            self.conn.commit()
+        except psycopg2.Error:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.autocommit = False
+
+    def swapped(self):
+        """Whether the job's swap has already been applied (False if the job cannot tell)."""
+        if not self.job.get('swapped'):
+            return False
+        with self.conn.cursor() as cur:
+            cur.execute(self.job['swapped'])
+            done = cur.fetchone()[0]
+        self.conn.commit()
+        return done
+
+    def checkpoint(self, restart=False):
+        """(last_key, rows_updated, finished) for this job, creating the checkpoint row if needed."""
+        with self.conn.cursor() as cur:
+            cur.execute(CHECKPOINT_DDL.format(table=self.checkpoint_table))
+            if restart:
+                cur.execute(f'DELETE FROM "{self.checkpoint_table}" WHERE job = %s', (self.name,))
+            cur.execute(f'SELECT last_key, rows_updated, finished FROM "{self.checkpoint_table}" WHERE job = %s',
+                        (self.name,))
+            row = cur.fetchone()
+            if row is None:
+                key = self.job.get('key', 'id')
+                cur.execute(f"SELECT coalesce(min({key}) - 1, 0) FROM {self.job['table']}")
+                row = (cur.fetchone()[0], 0, False)
+                cur.execute(f'INSERT INTO "{self.checkpoint_table}" (job, last_key) VALUES (%s, %s)',
+                            (self.name, row[0]))
+        self.conn.commit()
+        return row
+
+    def key_range(self):
+        key = self.job.get('key', 'id')
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT min({key}), max({key}) FROM {self.job['table']}")
+            low, high = cur.fetchone()
+        self.conn.commit()
+        return low or 0, high or 0
+
+    def run_chunk(self, after):
+        """One chunk in its own transaction; returns (last_key, keys_scanned, rows_updated)."""
+        delay = 0.5
+        for attempt in range(RETRIES + 1):
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT_MS}ms'")
+                    cur.execute(f"SET LOCAL statement_timeout = '{CHUNK_TIMEOUT_MS}ms'")
+                    cur.execute(self.sql, {'after': after, 'limit': self.chunk_size})
+                    last_key, scanned, updated = cur.fetchone()
+                    cur.execute(f'UPDATE "{self.checkpoint_table}" SET last_key = %s, '
+                                f'rows_updated = rows_updated + %s, finished = %s, updated_at = now() '
+                                f'WHERE job = %s', (last_key if scanned else after, updated, not scanned, self.name))
+                self.conn.commit()
+                return last_key, scanned, updated
+            except (psycopg2.errors.LockNotAvailable, psycopg2.errors.QueryCanceled) as e:
+                self.conn.rollback()
+                if attempt == RETRIES:
+                    raise
+                if isinstance(e, psycopg2.errors.QueryCanceled):
+                    self.chunk_size = max(MIN_CHUNK, self.chunk_size // 2)
+                sleep = delay * (1 + random.random() / 2)
+                print(f"  chunk after {after}: {str(e).strip().splitlines()[0]}; retry in {sleep:.1f}s "
+                      f"(chunk size {self.chunk_size})")
+                time.sleep(sleep)
+                delay *= 2
+
+    def pending_rows(self):
+        """Rows still matching the job's pending condition (None if the job has none)."""
+        if not self.job.get('pending'):
+            return None
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT count(*) FROM {self.job['table']} WHERE {self.job['pending']}")
+            count = cur.fetchone()[0]
+        self.conn.commit()
+        return count
+
+    def adapt(self, elapsed_ms):
+        """Move the chunk size towards target_ms, at most doubling or halving per chunk."""
+        if not self.target_ms or elapsed_ms <= 0:
+            return
+        factor = min(2.0, max(0.5, self.target_ms / elapsed_ms))
+        self.chunk_size = int(min(MAX_CHUNK, max(MIN_CHUNK, self.chunk_size * factor)))
+
+    def wait_for_replicas(self):
+        if not self.max_lag_bytes:
+            return
+        while True:
+            with self.conn.cursor() as cur:
+                cur.execute(LAG_SQL)
+                lag = cur.fetchone()[0]
+            self.conn.commit()
+            if lag <= self.max_lag_bytes:
+                return
+            print(f"  replication lag {lag / 1048576:.1f} MB > {self.max_lag_bytes / 1048576:.1f} MB; waiting")
+            time.sleep(1.0)
+
+    def run(self, restart=False):
+        """Backfill until no keys are left after the checkpoint; returns the rows updated."""
+        after, total_updated, finished = self.checkpoint(restart)
+        low, high = self.key_range()
+        start_key = after
+        print(f"{self.name}: {self.job['table']} keys {low}..{high}, resuming after {after} "
+              f"({total_updated:,} rows already updated)")
+        t0 = last_print = time.perf_counter()
+        updated_here = 0
+        while True:
+            c0 = time.perf_counter()
+            last_key, scanned, updated = self.run_chunk(after)
+            elapsed_ms = (time.perf_counter() - c0) * 1000
+            self.chunks.append({'after': after, 'scanned': scanned, 'updated': updated,
+                                'ms': round(elapsed_ms, 1), 'chunk_size': self.chunk_size})
+            if not scanned:
+                break
+            after = last_key
+            updated_here += updated
+            now = time.perf_counter()
+            if now - last_print >= PROGRESS_EVERY:
+                last_print = now
+                self.print_progress(start_key, after, high, updated_here, now - t0)
+            self.adapt(elapsed_ms)
+            self.wait_for_replicas()
+            if self.sleep:
+                time.sleep(self.sleep)
+        self.print_progress(start_key, after, max(high, after), updated_here, time.perf_counter() - t0)
+        return total_updated + updated_here
+
+    def print_progress(self, start_key, after, high, updated, seconds):
+        done = min(1.0, (after - start_key) / (high - start_key)) if high > start_key else 1.0
+        rate = updated / seconds if seconds else 0.0
+        eta = seconds * (1 - done) / done if done else 0.0
+        print(f"  {done * 100:>5.1f}%  key {after:,}/{high:,}  {updated:,} rows  {rate:,.0f} rows/s  "
+              f"chunk {self.chunk_size:,}  elapsed {format_duration(seconds)}  ETA {format_duration(eta)}")
+
+def jsonb_columns(paths):
+    """(table, column) for every jsonb column in the Drizzle modules."""
+    return [(t['name'], name) for t in parse_tables(paths) for name, c in t['columns'].items()
+            if c['type'] == 'jsonb']
+
+def job_from_args(args):
+    if args.job:
+        if args.job not in JOBS:
+            raise SystemExit(f"Unknown job {args.job}; known jobs: {', '.join(JOBS)}")
+        return args.job, JOBS[args.job]
+    if not (args.name and args.table and args.set):
+        raise SystemExit("Give a job name, or --name, --table and --set for an ad-hoc backfill")
+    return args.name, {'table': args.table, 'key': args.key, 'prepare': args.prepare, 'set': args.set,
+                       'pending': args.pending, 'swap': args.swap_sql, 'finalize': args.finalize_sql}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('job', nargs='?', help=f"predefined job ({', '.join(JOBS)})")
+    parser.add_argument('--name', help='ad-hoc job name (its checkpoint key)')
+    parser.add_argument('--table', help='ad-hoc job: table to backfill')
+    parser.add_argument('--key', default='id', help='ad-hoc job: unique, indexed integer key to paginate on')
+    parser.add_argument('--set', help='ad-hoc job: SET clause, e.g. "col = payload->>\'x\'"')
+    parser.add_argument('--pending', help='ad-hoc job: condition for rows still to update (default: every row; '
+                                          '--finalize only checks it when given)')
+    parser.add_argument('--prepare', action='append', default=[], help='ad-hoc job: statement to run first')
+    parser.add_argument('--swap-sql', action='append', default=[],
+                        help='ad-hoc job: --finalize statement run in the one transaction before the rest')
+    parser.add_argument('--finalize-sql', action='append', default=[], help='ad-hoc job: --finalize statement')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='initial keys per chunk')
+    parser.add_argument('--target-ms', type=int, default=TARGET_MS,
+                        help='resize chunks towards this duration (0 keeps --chunk-size fixed)')
+    parser.add_argument('--sleep', type=float, default=0.0, help='seconds to pause between chunks')
+    parser.add_argument('--max-lag-mb', type=float, help='pause while replica replay lag exceeds this')
+    parser.add_argument('--restart', action='store_true', help='discard the checkpoint and start over')
+    parser.add_argument('--finalize', action='store_true', help="run the job's finalize statements instead")
+    parser.add_argument('--dry-run', action='store_true', help='print the chunk statement and exit')
+    parser.add_argument('--report', help='write per-chunk timings as JSON')
+    parser.add_argument('--list-jsonb', nargs='*', metavar='SCHEMA_FILE',
+                        help='list jsonb columns in the Drizzle modules (default: all drizzle/*.ts) and exit')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.list_jsonb is not None:
+        columns = jsonb_columns(args.list_jsonb or sorted(glob.glob("drizzle/*.ts")))
+        for table, column in columns:
+            print(f"  {table}.{column}")
+        print(f"{len(columns)} jsonb columns")
+        raise SystemExit(0)
+
+    name, job = job_from_args(args)
+    # Chunks set their own statement_timeout; VALIDATE, CREATE INDEX CONCURRENTLY and the
+    # pending count must not be cut off by db_conn's default.
+    conn = connect(get_dsn(), statement_timeout_ms=0)
+    engine = Backfill(conn, name, job, args.chunk_size, args.sleep, args.target_ms,
+                      int(args.max_lag_mb * 1048576) if args.max_lag_mb else None)
+    if args.dry_run:
+        print(engine.sql)
+        raise SystemExit(0)
+    try:
+        if args.finalize:
+            if engine.swapped():
+                print(f"{name}: columns already swapped")
+            else:
+                pending = engine.pending_rows()
+                if pending is None:
+                    print(f"{name}: no pending condition given; not checking for unfinished rows")
+                elif pending:
+                    raise SystemExit(f"{name}: {pending:,} rows still match the pending condition "
+                                     f"({job.get('pending')}); fix or backfill them before --finalize")
+                if job.get('swap'):
+                    print(f"Swapping {name}:")
+                    engine.execute_all(job['swap'])
+            print(f"Finalizing {name}:")
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            engine.execute_all(job.get('finalize', []), autocommit=True)
+            raise SystemExit(0)
+        if job.get('prepare'):
+            print(f"Preparing {name}:")
+            engine.execute_all(job['prepare'])
+        t0 = time.perf_counter()
+        total = engine.run(restart=args.restart)
+        elapsed = time.perf_counter() - t0
+        print(f"{name}: done, {total:,} rows updated in total ({format_duration(elapsed)} this run, "
+              f"{len(engine.chunks)} chunks)")
+        if args.report:
+            write_file(args.report, json.dumps({'job': name, 'seconds': elapsed, 'rows_updated': total,
+                                                'chunks': engine.chunks}, indent=2) + '\n')
+    finally:
+        conn.close()
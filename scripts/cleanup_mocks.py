@@ -2,55 +2,57 @@
 """
 Clean up remaining mock data references in all 17 pages.
 Strategy: For each file, find mock data arrays/objects and replace references with tRPC data.
+
+Cleanups take a codemod.SourceFile and are registered with the shared engine,
+which reads and writes each page once (see codemod.py).
 """
 import re
-import os
+from functools import partial
 
-BASE = "/home/ubuntu/YOKAGE"
+from codemod import BraceIndex, Codemod
 
-def read_file(path):
-    with open(os.path.join(BASE, path), 'r') as f:
-        return f.read()
+BASE = "/home/ubuntu/YOKAGE"
 
-def write_file(path, content):
-    full = os.path.join(BASE, path)
-    with open(full, 'w') as f:
-        f.write(content)
+def is_mock_declaration(line):
+    return (line.startswith('const mock') or
+            line.startswith('// 模擬') or
+            (line.startswith('const ') and ('Mock' in line or 'mock' in line)))
 
-def find_mock_blocks(content):
-    """Find and return positions of mock data blocks"""
+def find_mock_blocks(content, index=None):
+    """Find and return (start, end) line ranges of mock data blocks"""
+    index = index or BraceIndex(content)
     blocks = []
-    lines = content.split('\n')
     i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        # Detect mock data declarations
-        if (line.startswith('const mock') or 
-            line.startswith('// 模擬') or
-            (line.startswith('const ') and ('Mock' in line or 'mock' in line))):
-            start = i
-            # Find the end of this block (matching braces/brackets)
-            brace_count = 0
-            bracket_count = 0
-            found_start = False
-            while i < len(lines):
-                for ch in lines[i]:
-                    if ch in '{[':
-                        if ch == '{': brace_count += 1
-                        else: bracket_count += 1
-                        found_start = True
-                    elif ch in '}]':
-                        if ch == '}': brace_count -= 1
-                        else: bracket_count -= 1
-                if found_start and brace_count <= 0 and bracket_count <= 0:
-                    # Check if line ends with ;
-                    if lines[i].rstrip().endswith(';') or lines[i].rstrip().endswith(']'):
-                        blocks.append((start, i))
-                        break
-                i += 1
+    while i < len(index.line_starts):
+        if is_mock_declaration(index.line_text(i).strip()):
+            end = index.statement_end_line(i, (';', ']'))
+            blocks.append((i, end))
+            i = end
         i += 1
     return blocks
 
+def is_const_mock(stripped):
+    return 'const mock' in stripped.lower() and '=' in stripped
+
+def remove_declarations(src, is_start, terminators=(';', ']')):
+    """Remove every statement whose first line matches is_start.
+
+    Block ends come from the file's shared bracket index, so brackets inside
+    strings, template literals and comments are ignored. A matching comment
+    line is removed on its own.
+    """
+    index = src.index
+    ranges = []
+    i = 0
+    while i < len(index.line_starts):
+        stripped = index.line_text(i).strip()
+        if is_start(stripped):
+            end = i if stripped.startswith('//') else index.statement_end_line(i, terminators)
+            ranges.append((i, end))
+            i = end
+        i += 1
+    return index.remove_lines(ranges)
+
 def remove_mock_blocks(content, var_names_to_keep=None):
     """Remove mock data blocks but keep the variable names for replacement"""
     lines = content.split('\n')
@@ -74,71 +76,39 @@ def remove_mock_blocks(content, var_names_to_keep=None):
     
     return '\n'.join(lines)
 
-def cleanup_file(filepath, replacements):
+def cleanup_file(src, replacements):
     """Clean up a file by removing mock data and replacing references"""
-    content = read_file(filepath)
+    content = src.text
     original = content
     
     for old, new in replacements:
         content = content.replace(old, new)
     
     if content != original:
-        write_file(filepath, content)
+        src.text = content
         mock_count = content.lower().count('mock')
-        print(f"  Cleaned: {filepath} (remaining mock refs: {mock_count})")
+        print(f"  Cleaned: {src.path} (remaining mock refs: {mock_count})")
     else:
-        print(f"  No changes: {filepath}")
+        print(f"  No changes: {src.path}")
 
 # ============================================================
 # Per-file cleanup
 # ============================================================
 
-def cleanup_inventory():
+def cleanup_inventory(src):
     """InventoryPage.tsx - remove mock inventory data"""
-    content = read_file("client/src/pages/InventoryPage.tsx")
-    
     # Remove mock data blocks
     # Find "// 模擬庫存" or "const mockInventory" blocks
-    lines = content.split('\n')
-    new_lines = []
-    skip_until_semicolon = False
-    brace_depth = 0
-    bracket_depth = 0
-    in_mock_block = False
-    
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        
-        # Detect start of mock block
-        if not in_mock_block and (
-            stripped.startswith('const mockInventory') or
-            stripped.startswith('const mockTransactions') or
-            stripped.startswith('const mockCategories') or
-            stripped.startswith('const mockSuppliers') or
-            stripped.startswith('// 模擬庫存') or
-            stripped.startswith('// 模擬交易') or
-            stripped.startswith('// 模擬分類') or
-            (stripped.startswith('const ') and 'mock' in stripped.lower() and ('=' in stripped))
-        ):
-            in_mock_block = True
-            brace_depth = 0
-            bracket_depth = 0
-            continue
-        
-        if in_mock_block:
-            for ch in stripped:
-                if ch == '{': brace_depth += 1
-                elif ch == '}': brace_depth -= 1
-                elif ch == '[': bracket_depth += 1
-                elif ch == ']': bracket_depth -= 1
-            
-            if brace_depth <= 0 and bracket_depth <= 0 and (stripped.endswith(';') or stripped.endswith(']')):
-                in_mock_block = False
-            continue
-        
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+    content = remove_declarations(src, lambda stripped: (
+        stripped.startswith('const mockInventory') or
+        stripped.startswith('const mockTransactions') or
+        stripped.startswith('const mockCategories') or
+        stripped.startswith('const mockSuppliers') or
+        stripped.startswith('// 模擬庫存') or
+        stripped.startswith('// 模擬交易') or
+        stripped.startswith('// 模擬分類') or
+        (stripped.startswith('const ') and 'mock' in stripped.lower() and ('=' in stripped))
+    ))
     
     # Replace references to mock variables
     content = content.replace('mockInventory', 'inventoryItems')
@@ -149,259 +119,98 @@ def cleanup_inventory():
     # Remove useState that initializes with mock data
     content = re.sub(r'const \[items, setItems\] = useState\([^)]*\);', '// items from tRPC query', content)
     
-    write_file("client/src/pages/InventoryPage.tsx", content)
+    src.text = content
     print(f"  Cleaned: InventoryPage.tsx")
 
-def cleanup_line_integration():
-    content = read_file("client/src/pages/LineIntegrationPage.tsx")
-    
-    lines = content.split('\n')
-    new_lines = []
-    in_mock = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not in_mock and ('mockLineConfig' in stripped or 'mockWebhookEvents' in stripped) and 'const ' in stripped:
-            in_mock = True
-            depth = 0
-            continue
-        if in_mock:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped.endswith(']')):
-                in_mock = False
-            continue
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+def cleanup_line_integration(src):
+    content = remove_declarations(src, lambda stripped: (
+        ('mockLineConfig' in stripped or 'mockWebhookEvents' in stripped) and 'const ' in stripped
+    ))
     content = content.replace('mockLineConfig', 'lineStatus')
     content = content.replace('mockWebhookEvents', 'webhookEvents')
     
-    write_file("client/src/pages/LineIntegrationPage.tsx", content)
+    src.text = content
     print(f"  Cleaned: LineIntegrationPage.tsx")
 
-def cleanup_notifications():
-    content = read_file("client/src/pages/NotificationsPage.tsx")
-    
-    lines = content.split('\n')
-    new_lines = []
-    in_mock = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not in_mock and 'const mock' in stripped.lower() and '=' in stripped:
-            in_mock = True
-            depth = 0
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped == ''):
-                in_mock = False
-            continue
-        if in_mock:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped.endswith(']') or stripped.endswith('}')):
-                in_mock = False
-            continue
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+def cleanup_notifications(src):
+    content = remove_declarations(src, is_const_mock, (';', ']', '}'))
     content = content.replace('mockNotifications', 'notifications')
     content = content.replace('mockSettings', 'notifSettings')
     content = content.replace('mockTemplates', '[]')
     
-    write_file("client/src/pages/NotificationsPage.tsx", content)
+    src.text = content
     print(f"  Cleaned: NotificationsPage.tsx")
 
-def cleanup_payment():
-    content = read_file("client/src/pages/PaymentPage.tsx")
-    
-    lines = content.split('\n')
-    new_lines = []
-    in_mock = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not in_mock and 'const mock' in stripped.lower() and '=' in stripped:
-            in_mock = True
-            depth = 0
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and stripped.endswith(';'):
-                in_mock = False
-            continue
-        if in_mock:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped.endswith(']')):
-                in_mock = False
-            continue
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+def cleanup_payment(src):
+    content = remove_declarations(src, is_const_mock)
     content = content.replace('mockTransactions', 'transactions')
     content = content.replace('mockPaymentMethods', 'providers')
     content = content.replace('mockOrders', 'orderList')
     
-    write_file("client/src/pages/PaymentPage.tsx", content)
+    src.text = content
     print(f"  Cleaned: PaymentPage.tsx")
 
-def cleanup_richmenu():
-    content = read_file("client/src/pages/RichMenuPage.tsx")
-    
-    lines = content.split('\n')
-    new_lines = []
-    in_mock = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not in_mock and 'const mock' in stripped.lower() and '=' in stripped:
-            in_mock = True
-            depth = 0
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and stripped.endswith(';'):
-                in_mock = False
-            continue
-        if in_mock:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped.endswith(']')):
-                in_mock = False
-            continue
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+def cleanup_richmenu(src):
+    content = remove_declarations(src, is_const_mock)
     content = content.replace('mockRichMenus', 'richMenus')
     content = content.replace('mockMenus', 'richMenus')
     
     # Fix useState that uses mock data
     content = re.sub(r'const \[menus, setMenus\] = useState\([^)]*\);', '// menus from tRPC query', content)
     
-    write_file("client/src/pages/RichMenuPage.tsx", content)
+    src.text = content
     print(f"  Cleaned: RichMenuPage.tsx")
 
-def cleanup_webhook():
-    content = read_file("client/src/pages/WebhookPage.tsx")
-    
-    lines = content.split('\n')
-    new_lines = []
-    in_mock = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not in_mock and 'const mock' in stripped.lower() and '=' in stripped:
-            in_mock = True
-            depth = 0
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and stripped.endswith(';'):
-                in_mock = False
-            continue
-        if in_mock:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped.endswith(']')):
-                in_mock = False
-            continue
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+def cleanup_webhook(src):
+    content = remove_declarations(src, is_const_mock)
     content = content.replace('mockWebhookEvents', 'webhookEvents')
     content = content.replace('mockEvents', 'webhookEvents')
     content = content.replace('mockWebhookConfig', '{}')
     
-    write_file("client/src/pages/WebhookPage.tsx", content)
+    src.text = content
     print(f"  Cleaned: WebhookPage.tsx")
 
-def cleanup_dashboard_page(filepath, replacements):
+def cleanup_dashboard_page(src, replacements):
     """Generic cleanup for dashboard pages"""
-    content = read_file(filepath)
-    
-    lines = content.split('\n')
-    new_lines = []
-    in_mock = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not in_mock and (
-            ('const mock' in stripped.lower() and '=' in stripped) or
-            stripped.startswith('// 模擬')
-        ):
-            if stripped.startswith('//'):
-                continue  # Skip comment lines
-            in_mock = True
-            depth = 0
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped == ''):
-                in_mock = False
-            continue
-        if in_mock:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and (stripped.endswith(';') or stripped.endswith(']') or stripped.endswith('}')):
-                in_mock = False
-            continue
-        new_lines.append(line)
-    
-    content = '\n'.join(new_lines)
+    content = remove_declarations(src, lambda stripped: (
+        is_const_mock(stripped) or stripped.startswith('// 模擬')
+    ), (';', ']', '}'))
     
     for old, new in replacements:
         content = content.replace(old, new)
     
-    write_file(filepath, content)
+    src.text = content
     mock_count = content.lower().count('mock')
-    print(f"  Cleaned: {filepath} (remaining mock refs: {mock_count})")
+    print(f"  Cleaned: {src.path} (remaining mock refs: {mock_count})")
 
 # ============================================================
-# Execute all cleanups
+# Registration and execution
 # ============================================================
-if __name__ == "__main__":
-    print("Starting mock data cleanup...")
-    
-    cleanup_inventory()
-    cleanup_line_integration()
-    cleanup_notifications()
-    cleanup_payment()
-    cleanup_richmenu()
-    cleanup_webhook()
-    
-    # Dashboard pages
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardAppointments.tsx", [
+CLEANUPS = [
+    ("client/src/pages/InventoryPage.tsx", cleanup_inventory),
+    ("client/src/pages/LineIntegrationPage.tsx", cleanup_line_integration),
+    ("client/src/pages/NotificationsPage.tsx", cleanup_notifications),
+    ("client/src/pages/PaymentPage.tsx", cleanup_payment),
+    ("client/src/pages/RichMenuPage.tsx", cleanup_richmenu),
+    ("client/src/pages/WebhookPage.tsx", cleanup_webhook),
+]
+
+# Dashboard pages
+DASHBOARD_REPLACEMENTS = {
+    "client/src/pages/dashboard/DashboardAppointments.tsx": [
         ('mockAppointments', 'appointments'),
         ('mockStaff', 'staffData?.data ?? []'),
-    ])
-    
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardCustomers.tsx", [
+    ],
+    "client/src/pages/dashboard/DashboardCustomers.tsx": [
         ('mockCustomers', 'customers'),
         ('mockTags', 'tags'),
-    ])
-    
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardMarketing.tsx", [
+    ],
+    "client/src/pages/dashboard/DashboardMarketing.tsx": [
         ('mockCampaigns', 'campaigns'),
         ('mockBroadcasts', 'broadcasts'),
         ('mockPromotions', 'campaigns'),
-    ])
-    
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardReports.tsx", [
+    ],
+    "client/src/pages/dashboard/DashboardReports.tsx": [
         ('mockRevenueData', 'revenueData'),
         ('mockAppointmentData', 'apptStats'),
         ('mockCustomerData', 'custStats'),
@@ -409,23 +218,33 @@ if __name__ == "__main__":
         ('mockMonthlyRevenue', 'revenueData?.monthlyRevenue ?? []'),
         ('mockServiceRevenue', 'revenueData?.serviceRevenue ?? []'),
         ('mockStaffPerformance', '[]'),
-    ])
-    
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardSchedule.tsx", [
+    ],
+    "client/src/pages/dashboard/DashboardSchedule.tsx": [
         ('mockSchedules', 'schedules'),
         ('mockStaff', 'staffList'),
         ('mockShifts', 'schedules'),
-    ])
-    
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardSettings.tsx", [
+    ],
+    "client/src/pages/dashboard/DashboardSettings.tsx": [
         ('mockSettings', 'settings'),
         ('mockClinicInfo', 'orgData ?? {}'),
-    ])
-    
-    cleanup_dashboard_page("client/src/pages/dashboard/DashboardStaff.tsx", [
+    ],
+    "client/src/pages/dashboard/DashboardStaff.tsx": [
         ('mockStaffData', 'staffList'),
         ('mockStaff', 'staffList'),
-    ])
+    ],
+}
+
+def register(engine):
+    for path, func in CLEANUPS:
+        engine.add(path, func)
+    for path, replacements in DASHBOARD_REPLACEMENTS.items():
+        engine.add(path, partial(cleanup_dashboard_page, replacements=replacements), "cleanup_dashboard_page")
+
+if __name__ == "__main__":
+    print("Starting mock data cleanup...")
+    engine = Codemod(BASE)
+    register(engine)
+    engine.run()
     
     print("\nAll cleanups complete!")
     
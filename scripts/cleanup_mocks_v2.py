@@ -2,59 +2,39 @@
 """
 Aggressive cleanup of remaining mock data in all files.
 This script removes mock data blocks and replaces all remaining references.
+Each page's cleanup is registered with the shared codemod engine (see codemod.py).
 """
 import re
-import os
+from functools import partial
 
-BASE = "/home/ubuntu/YOKAGE"
-
-def read_file(path):
-    with open(os.path.join(BASE, path), 'r') as f:
-        return f.read()
+from codemod import BraceIndex, Codemod
 
-def write_file(path, content):
-    with open(os.path.join(BASE, path), 'w') as f:
-        f.write(content)
+BASE = "/home/ubuntu/YOKAGE"
 
-def remove_block_between(content, start_pattern, end_patterns):
+BLOCK_END_PATTERNS = [';', '];', '};', '}']
+
+def find_blocks(index, start_patterns, end_patterns):
+    """(start, end) line ranges of statements whose stripped first line matches a start pattern"""
+    start_re = re.compile('|'.join(f'(?:{p})' for p in start_patterns))
+    blocks = []
+    i = 0
+    while i < len(index.line_starts):
+        if start_re.search(index.line_text(i).strip()):
+            end = index.statement_end_line(i, end_patterns)
+            blocks.append((i, end))
+            i = end
+        i += 1
+    return blocks
+
+def remove_block_between(content, start_pattern, end_patterns, index=None):
     """Remove a block of code starting from a pattern to matching end"""
-    lines = content.split('\n')
-    result = []
-    skip = False
-    depth = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        if not skip and re.search(start_pattern, stripped):
-            skip = True
-            depth = 0
-            # Count braces on this line
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and any(stripped.endswith(ep) for ep in end_patterns):
-                skip = False
-            continue
-        
-        if skip:
-            for ch in stripped:
-                if ch in '{[': depth += 1
-                elif ch in '}]': depth -= 1
-            if depth <= 0 and any(stripped.endswith(ep) for ep in end_patterns):
-                skip = False
-            continue
-        
-        result.append(line)
-    
-    return '\n'.join(result)
+    index = index or BraceIndex(content)
+    return index.remove_lines(find_blocks(index, [start_pattern], end_patterns))
 
-def process_file(filepath, block_patterns, replacements):
+def process_file(src, block_patterns, replacements):
     """Process a single file: remove mock blocks and replace references"""
-    content = read_file(filepath)
-    
-    for pattern in block_patterns:
-        content = remove_block_between(content, pattern, [';', '];', '};', '}'])
+    # All block patterns are resolved against one bracket index of the file.
+    content = src.index.remove_lines(find_blocks(src.index, block_patterns, BLOCK_END_PATTERNS))
     
     for old, new in replacements:
         content = content.replace(old, new)
@@ -69,133 +49,143 @@ def process_file(filepath, block_patterns, replacements):
         result.append(line)
     content = '\n'.join(result)
     
-    write_file(filepath, content)
+    src.text = content
     mock_count = sum(1 for line in content.split('\n') if 'mock' in line.lower())
-    print(f"  {filepath}: {mock_count} mock lines remaining")
+    print(f"  {src.path}: {mock_count} mock lines remaining")
 
 # ============================================================
-# Process each file
+# Per-file cleanups
 # ============================================================
 
-print("=== Aggressive Mock Cleanup v2 ===\n")
-
-# InventoryPage
-process_file("client/src/pages/InventoryPage.tsx",
-    [r'^const mockAlerts', r'^const mockMovements', r'^const mockCategories', r'^const mockSuppliers'],
-    [
-        ('mockAlerts', '([] as any[])'),
-        ('mockMovements', '([] as any[])'),
-        ('mockCategories', '([] as any[])'),
-        ('mockSuppliers', '([] as any[])'),
-    ])
-
-# NotificationsPage
-process_file("client/src/pages/NotificationsPage.tsx",
-    [r'^const mockTemplates', r'^const mockLogs', r'^const mockScheduledTasks', r'^const mockNotificationSettings'],
-    [
-        ('mockLogs', 'notifications'),
-        ('mockScheduledTasks', '([] as any[])'),
-        ('mockTemplates', '([] as any[])'),
-        ('mockNotificationSettings', 'notifSettings'),
-    ])
-
-# PaymentPage
-process_file("client/src/pages/PaymentPage.tsx",
-    [r'^const mockPendingOrders', r'^const mockPaymentRecords', r'^const mockPaymentMethods'],
-    [
-        ('mockPendingOrders', 'orderList'),
-        ('mockPaymentRecords', 'transactions'),
-        ('mockPaymentMethods', 'providers'),
-        ('typeof mockPendingOrders[0]', 'any'),
-        ('typeof mockPaymentRecords[0]', 'any'),
-    ])
-
-# WebhookPage
-process_file("client/src/pages/WebhookPage.tsx",
-    [r'^const mockWebhookRules', r'^const mockEventLogs', r'^const mockWebhookConfig'],
-    [
-        ('mockWebhookRules', 'webhookEvents'),
-        ('mockEventLogs', 'webhookEvents'),
-        ('mockWebhookConfig', '{}'),
-        ('typeof mockWebhookRules[0]', 'any'),
-    ])
-
-# LineIntegrationPage
-process_file("client/src/pages/LineIntegrationPage.tsx",
-    [r'^const mockRichMenus', r'^const mockMessageTemplates'],
-    [
-        ('mockRichMenus', 'richMenus'),
-        ('mockMessageTemplates', '([] as any[])'),
-    ])
-
-# DashboardReports
-process_file("client/src/pages/dashboard/DashboardReports.tsx",
-    [r'^const mockEmployeeData', r'^const mockRevenueData', r'^const mockAppointmentData', 
-     r'^const mockCustomerData', r'^const mockDailyRevenue', r'^const mockMonthlyRevenue',
-     r'^const mockServiceRevenue', r'^const mockStaffPerformance'],
-    [
-        ('mockEmployeeData.kpis.totalAppointments', 'String(apptStats?.totalAppointments ?? 0)'),
-        ('mockEmployeeData.kpis.avgRating', 'String(apptStats?.avgRating ?? "-")'),
-        ('mockEmployeeData.kpis.topPerformer', 'String(apptStats?.topPerformer ?? "-")'),
-        ('mockEmployeeData.ranking', '(apptStats?.ranking ?? [])'),
-        ('mockEmployeeData.appointments', '(apptStats?.appointments ?? [])'),
-        ('mockEmployeeData.ratings', '(apptStats?.ratings ?? [])'),
-        ('mockEmployeeData', '(apptStats ?? {} as any)'),
-        ('mockRevenueData', 'revenueData'),
-        ('mockAppointmentData', 'apptStats'),
-        ('mockCustomerData', 'custStats'),
-    ])
-
-# DashboardSettings
-process_file("client/src/pages/dashboard/DashboardSettings.tsx",
-    [r'^const mockBusinessHours', r'^const mockServices', r'^const mockClinicInfo'],
-    [
-        ('typeof mockBusinessHours[0]', 'any'),
-        ('typeof mockServices[0]', 'any'),
-        ('mockBusinessHours', '([] as any[])'),
-        ('mockServices', '([] as any[])'),
-        ('mockClinicInfo', '(orgData ?? {} as any)'),
-    ])
-
-# DashboardCustomers
-process_file("client/src/pages/dashboard/DashboardCustomers.tsx",
-    [r'^const generateMockCustomers'],
-    [
-        ('generateMockCustomers()', 'customers'),
-        ('generateMockCustomers', '(() => customers)'),
-    ])
-
-# DashboardMarketing
-process_file("client/src/pages/dashboard/DashboardMarketing.tsx",
-    [r'^const mockSegments', r'^const mockCampaignData'],
-    [
-        ('mockSegments', '(campaigns as any[])'),
-        ('mockCampaignData', '(campaigns as any[])'),
-    ])
-
-# DashboardAppointments
-process_file("client/src/pages/dashboard/DashboardAppointments.tsx",
-    [r'^const mockAppointments', r'^const mockStaffList'],
-    [
-        ('mockAppointments', 'appointments'),
-        ('mockStaffList', '(staffData?.data ?? [])'),
-    ])
-
-# DashboardSchedule
-process_file("client/src/pages/dashboard/DashboardSchedule.tsx",
-    [r'^const generateMockShifts', r'^const mockStaffList'],
-    [
-        ('generateMockShifts()', 'schedules'),
-        ('generateMockShifts', '(() => schedules)'),
-        ('mockStaffList', 'staffList'),
-    ])
-
-# DashboardStaff
-process_file("client/src/pages/dashboard/DashboardStaff.tsx",
-    [r'^const mockStaffData', r'^const mockDepartments'],
-    [
-        ('mockStaffData', 'staffList'),
-        ('mockDepartments', '([] as any[])'),
-    ])
-
-print("\n=== Cleanup Complete ===")
+CLEANUPS = [
+    # InventoryPage
+    ("client/src/pages/InventoryPage.tsx",
+        [r'^const mockAlerts', r'^const mockMovements', r'^const mockCategories', r'^const mockSuppliers'],
+        [
+            ('mockAlerts', '([] as any[])'),
+            ('mockMovements', '([] as any[])'),
+            ('mockCategories', '([] as any[])'),
+            ('mockSuppliers', '([] as any[])'),
+        ]),
+
+    # NotificationsPage
+    ("client/src/pages/NotificationsPage.tsx",
+        [r'^const mockTemplates', r'^const mockLogs', r'^const mockScheduledTasks', r'^const mockNotificationSettings'],
+        [
+            ('mockLogs', 'notifications'),
+            ('mockScheduledTasks', '([] as any[])'),
+            ('mockTemplates', '([] as any[])'),
+            ('mockNotificationSettings', 'notifSettings'),
+        ]),
+
+    # PaymentPage
+    ("client/src/pages/PaymentPage.tsx",
+        [r'^const mockPendingOrders', r'^const mockPaymentRecords', r'^const mockPaymentMethods'],
+        [
+            ('mockPendingOrders', 'orderList'),
+            ('mockPaymentRecords', 'transactions'),
+            ('mockPaymentMethods', 'providers'),
+            ('typeof mockPendingOrders[0]', 'any'),
+            ('typeof mockPaymentRecords[0]', 'any'),
+        ]),
+
+    # WebhookPage
+    ("client/src/pages/WebhookPage.tsx",
+        [r'^const mockWebhookRules', r'^const mockEventLogs', r'^const mockWebhookConfig'],
+        [
+            ('mockWebhookRules', 'webhookEvents'),
+            ('mockEventLogs', 'webhookEvents'),
+            ('mockWebhookConfig', '{}'),
+            ('typeof mockWebhookRules[0]', 'any'),
+        ]),
+
+    # LineIntegrationPage
+    ("client/src/pages/LineIntegrationPage.tsx",
+        [r'^const mockRichMenus', r'^const mockMessageTemplates'],
+        [
+            ('mockRichMenus', 'richMenus'),
+            ('mockMessageTemplates', '([] as any[])'),
+        ]),
+
+    # DashboardReports
+    ("client/src/pages/dashboard/DashboardReports.tsx",
+        [r'^const mockEmployeeData', r'^const mockRevenueData', r'^const mockAppointmentData', 
+         r'^const mockCustomerData', r'^const mockDailyRevenue', r'^const mockMonthlyRevenue',
+         r'^const mockServiceRevenue', r'^const mockStaffPerformance'],
+        [
+            ('mockEmployeeData.kpis.totalAppointments', 'String(apptStats?.totalAppointments ?? 0)'),
+            ('mockEmployeeData.kpis.avgRating', 'String(apptStats?.avgRating ?? "-")'),
+            ('mockEmployeeData.kpis.topPerformer', 'String(apptStats?.topPerformer ?? "-")'),
+            ('mockEmployeeData.ranking', '(apptStats?.ranking ?? [])'),
+            ('mockEmployeeData.appointments', '(apptStats?.appointments ?? [])'),
+            ('mockEmployeeData.ratings', '(apptStats?.ratings ?? [])'),
+            ('mockEmployeeData', '(apptStats ?? {} as any)'),
+            ('mockRevenueData', 'revenueData'),
+            ('mockAppointmentData', 'apptStats'),
+            ('mockCustomerData', 'custStats'),
+        ]),
+
+    # DashboardSettings
+    ("client/src/pages/dashboard/DashboardSettings.tsx",
+        [r'^const mockBusinessHours', r'^const mockServices', r'^const mockClinicInfo'],
+        [
+            ('typeof mockBusinessHours[0]', 'any'),
+            ('typeof mockServices[0]', 'any'),
+            ('mockBusinessHours', '([] as any[])'),
+            ('mockServices', '([] as any[])'),
+            ('mockClinicInfo', '(orgData ?? {} as any)'),
+        ]),
+
+    # DashboardCustomers
+    ("client/src/pages/dashboard/DashboardCustomers.tsx",
+        [r'^const generateMockCustomers'],
+        [
+            ('generateMockCustomers()', 'customers'),
+            ('generateMockCustomers', '(() => customers)'),
+        ]),
+
+    # DashboardMarketing
+    ("client/src/pages/dashboard/DashboardMarketing.tsx",
+        [r'^const mockSegments', r'^const mockCampaignData'],
+        [
+            ('mockSegments', '(campaigns as any[])'),
+            ('mockCampaignData', '(campaigns as any[])'),
+        ]),
+
+    # DashboardAppointments
+    ("client/src/pages/dashboard/DashboardAppointments.tsx",
+        [r'^const mockAppointments', r'^const mockStaffList'],
+        [
+            ('mockAppointments', 'appointments'),
+            ('mockStaffList', '(staffData?.data ?? [])'),
+        ]),
+
+    # DashboardSchedule
+    ("client/src/pages/dashboard/DashboardSchedule.tsx",
+        [r'^const generateMockShifts', r'^const mockStaffList'],
+        [
+            ('generateMockShifts()', 'schedules'),
+            ('generateMockShifts', '(() => schedules)'),
+            ('mockStaffList', 'staffList'),
+        ]),
+
+    # DashboardStaff
+    ("client/src/pages/dashboard/DashboardStaff.tsx",
+        [r'^const mockStaffData', r'^const mockDepartments'],
+        [
+            ('mockStaffData', 'staffList'),
+            ('mockDepartments', '([] as any[])'),
+        ]),
+]
+
+def register(engine):
+    for path, block_patterns, replacements in CLEANUPS:
+        engine.add(path, partial(process_file, block_patterns=block_patterns, replacements=replacements),
+                   "process_file")
+
+if __name__ == "__main__":
+    print("=== Aggressive Mock Cleanup v2 ===\n")
+    engine = Codemod(BASE)
+    register(engine)
+    engine.run()
+    print("\n=== Cleanup Complete ===")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Shared codemod engine for the page transformation and mock cleanup scripts.
+
+Scripts register transforms against file paths instead of reading and
+writing files themselves. The engine loads each file once, builds a
+lightweight index of it (line offsets and bracket pairs) on first use,
+applies that file's transforms in registration order, and writes the file
+once if anything changed. Running several scripts together therefore
+costs one read, one index and one write per page:
+
+  python scripts/codemod.py transform_pages cleanup_mocks cleanup_mocks_v2
+
+Files are independent, so -j N spreads them over a process pool; each run
+ends with a per-transform table (status, bytes changed, elapsed ms) and
+--report writes the same results, with tracebacks, as JSON.
+
+A transform is a function taking a SourceFile. It reads src.text (or the
+helpers built on the index) and assigns src.text once it is done; the
+index is rebuilt lazily after each assignment.
+"""
+import argparse
+import bisect
+import importlib
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_write import AtomicWriter, fsync_dirs, write_file
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OPENERS = {'{': '}', '[': ']', '(': ')'}
+CLOSERS = {v: k for k, v in OPENERS.items()}
+
+# Tokens that matter for bracket matching. Strings and comments are matched
+# whole so brackets inside them are skipped; ordinary strings cannot span
+# lines, which keeps an apostrophe in JSX text from swallowing the file.
+CODE_TOKEN_RE = re.compile(r"""
+    //[^\n]*
+  | /\*[\s\S]*?(?:\*/|\Z)
+  | '(?:\\.|[^'\\\n])*'?
+  | "(?:\\.|[^"\\\n])*"?
+  | `
+  | [{}\[\]()]
+""", re.VERBOSE)
+TEMPLATE_TOKEN_RE = re.compile(r"\\[\s\S]|`|\$\{")
+
+class BraceIndex:
+    """Line offsets and matching bracket pairs for a TS/TSX text.
+
+    Built in one left-to-right scan that skips string literals, comments and
+    the literal parts of template strings (but not their ${...} holes).
+    block_end[n] is the last line reached by a bracket opened on line n, so
+    "where does the block starting at line n end" is a list lookup.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+        self.block_end = list(range(len(self.line_starts)))
+        self.pairs = {}
+        self._scan()
+
+    def _scan(self):
+        text = self.text
+        stack = []          # (char, offset, line); char '${' marks a template hole
+        templates = 0       # template literals we are inside, outside any hole
+        pos = 0
+        line = 0
+        while True:
+            m = (TEMPLATE_TOKEN_RE if templates else CODE_TOKEN_RE).search(text, pos)
+            if not m:
+                break
+            line += text.count('\n', pos, m.start())
+            tok = m.group(0)
+            if templates:
+                if tok == '`':
+                    templates -= 1
+                elif tok == '${':
+                    stack.append(('${', m.start() + 1, line))
+                    templates -= 1
+            elif tok == '`':
+                templates += 1
+            elif tok in OPENERS:
+                stack.append((tok, m.start(), line))
+            elif tok in CLOSERS:
+                expected = ('{', '${') if tok == '}' else (CLOSERS[tok],)
+                if stack and stack[-1][0] in expected:
+                    opener, offset, open_line = stack.pop()
+                    self.pairs[offset] = m.start()
+                    if line > self.block_end[open_line]:
+                        self.block_end[open_line] = line
+                    if opener == '${':
+                        templates += 1
+            line += tok.count('\n')
+            pos = m.end()
+
+    def line_of(self, pos):
+        """0-based line number containing offset pos."""
+        return bisect.bisect_right(self.line_starts, pos) - 1
+
+    def line_text(self, line):
+        start = self.line_starts[line]
+        end = self.line_starts[line + 1] - 1 if line + 1 < len(self.line_starts) else len(self.text)
+        return self.text[start:end]
+
+    def block_end_line(self, line):
+        """Last line of the bracketed block opened on `line`, or `line` if none opens."""
+        return self.block_end[line]
+
+    def statement_end_line(self, line, terminators=(';',)):
+        """Last line of the statement starting at `line`.
+
+        Follows brackets via block_end and then continues line by line (through
+        any further blocks, e.g. a chained .map(...)) until a line ends with one
+        of `terminators`. Returns the last line of the file if none does.
+        """
+        last = len(self.line_starts) - 1
+        end = self.block_end[line]
+        while end < last and not self.line_text(end).rstrip().endswith(tuple(terminators)):
+            end = self.block_end[end + 1]
+        return end
+
+    def remove_lines(self, ranges):
+        """Text with the inclusive (start, end) line ranges removed."""
+        lines = self.text.split('\n')
+        for start, end in sorted(ranges, reverse=True):
+            del lines[start:end + 1]
+        return '\n'.join(lines)
+
+class SourceFile:
+    """One file's text plus a lazily built BraceIndex."""
+
+    def __init__(self, path, text):
+        self.path = path
+        self.original = text
+        self._text = text
+        self._lines = None
+        self._index = None
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        if value != self._text:
+            self._text = value
+            self._lines = None
+            self._index = None
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self._text.split('\n')
+        return self._lines
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = BraceIndex(self._text)
+        return self._index
+
+    @property
+    def changed(self):
+        return self._text != self.original
+
+def changed_bytes(before, after):
+    """Size in bytes of the span that differs between two texts (0 if equal)."""
+    if before == after:
+        return 0
+    a, b = before.encode(), after.encode()
+    prefix = len(os.path.commonprefix([a, b]))
+    limit = min(len(a), len(b)) - prefix
+    suffix = len(os.path.commonprefix([a[::-1][:limit], b[::-1][:limit]]))
+    return max(len(a), len(b)) - prefix - suffix
+
+def splice(content, edits):
+    """Apply non-overlapping (start, end, text) edits in one pass; zero-width inserts keep their order."""
+    out = []
+    pos = 0
+    for start, end, text in sorted(edits, key=lambda e: (e[0], e[1])):
+        if start < pos:
+            continue
+        out.append(content[pos:start])
+        out.append(text)
+        pos = end
+    out.append(content[pos:])
+    return ''.join(out)
+
+def load_source(base, path):
+    with open(os.path.join(base, path), 'r') as f:
+        return SourceFile(path, f.read())
+
+def write_source(base, src, writer=None):
+    """Atomically write src if its content differs from the file on disk.
+
+    Without a writer the directory fsync is left to the caller (see
+    Codemod.run), so pool workers do not each sync the same directories.
+    """
+    writer = writer or AtomicWriter(sync_dirs=False)
+    if not writer.write(os.path.join(base, src.path), src.text):
+        return False
+    print(f"  Written: {src.path} ({src.text.count(chr(10))+1} lines)")
+    return True
+
+def _result(path, name, error=None, bytes_changed=0, elapsed_ms=0.0):
+    return {
+        'path': path,
+        'transform': name,
+        'ok': error is None,
+        'error': error,
+        'bytes_changed': bytes_changed,
+        'elapsed_ms': round(elapsed_ms, 3),
+    }
+
+def apply_transforms(base, path, transforms):
+    """Load one file, run its (name, func) transforms in order, write it once.
+
+    Module-level so it can run in a worker process. Returns one result dict
+    per transform; a file that cannot be read yields a single failed result.
+    """
+    try:
+        src = load_source(base, path)
+    except OSError:
+        print(f"  ERROR: cannot read {path}")
+        return [_result(path, None, traceback.format_exc())]
+    results = []
+    for name, func in transforms:
+        before = src.text
+        t0 = time.perf_counter()
+        try:
+            func(src)
+            error = None
+            print(f"  OK: {name}")
+        except Exception as e:
+            error = traceback.format_exc()
+            print(f"  ERROR: {name}: {e}")
+        elapsed = (time.perf_counter() - t0) * 1000
+        results.append(_result(path, name, error, changed_bytes(before, src.text), elapsed))
+    written = src.changed and write_source(base, src)
+    for r in results:
+        r['written'] = written
+    return results
+
+def print_summary(results, seconds=None):
+    """Table of per-transform results, slowest first, with failures listed after it."""
+    rows = sorted(results, key=lambda r: r['elapsed_ms'], reverse=True)
+    width = max([len(r['transform'] or '-') for r in rows] + [9])
+    print(f"\n{'transform':<{width}}  {'status':<6}  {'bytes':>8}  {'ms':>9}  path")
+    for r in rows:
+        status = 'ok' if r['ok'] else 'FAILED'
+        print(f"{r['transform'] or '-':<{width}}  {status:<6}  {r['bytes_changed']:>8}  {r['elapsed_ms']:>9.1f}  {r['path']}")
+    failed = [r for r in results if not r['ok']]
+    for r in failed:
+        print(f"\n--- {r['transform'] or 'load'} ({r['path']}) ---\n{r['error'].rstrip()}")
+    total = f" in {seconds:.2f}s" if seconds is not None else ""
+    files = len({r['path'] for r in results})
+    written = len({r['path'] for r in results if r.get('written')})
+    print(f"\n{len(results) - len(failed)}/{len(results)} transforms applied to {files} files "
+          f"({written} written){total}")
+
+class Codemod:
+    """Ordered registry of per-file transforms with one load and one write per file."""
+
+    def __init__(self, base=REPO_ROOT):
+        self.base = base
+        self.transforms = []
+
+    def add(self, path, func, name=None):
+        self.transforms.append((path, name or func.__name__, func))
+
+    def transform(self, path, name=None):
+        """Decorator form of add()."""
+        def decorator(func):
+            self.add(path, func, name)
+            return func
+        return decorator
+
+    def paths(self):
+        seen = []
+        for path, _, _ in self.transforms:
+            if path not in seen:
+                seen.append(path)
+        return seen
+
+    def load(self, path):
+        return load_source(self.base, path)
+
+    def write(self, src):
+        return write_source(self.base, src, AtomicWriter())
+
+    def run(self, jobs=1):
+        """Apply every transform; returns one result dict per transform run.
+
+        Files are independent, so with jobs > 1 they are processed in a
+        process pool (transforms must then be picklable: module-level
+        functions or partials of them). Results keep registration order.
+        Changed files are written atomically and skipped when identical
+        to what is on disk; touched directories are fsynced once at the end.
+        """
+        groups = [(path, [(name, func) for tpath, name, func in self.transforms if tpath == path])
+                  for path in self.paths()]
+        bases = [self.base] * len(groups)
+        paths = [path for path, _ in groups]
+        transforms = [t for _, t in groups]
+        if jobs > 1 and len(groups) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                per_file = list(pool.map(apply_transforms, bases, paths, transforms))
+        else:
+            per_file = list(map(apply_transforms, bases, paths, transforms))
+        fsync_dirs(os.path.dirname(os.path.join(self.base, results[0]['path']))
+                   for results in per_file if results and results[0].get('written'))
+        return [r for results in per_file for r in results]
+
+def write_report(path, results, seconds):
+    write_file(path, json.dumps({'seconds': seconds, 'results': results}, indent=2, ensure_ascii=False) + '\n')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='+', help='script modules to combine, e.g. transform_pages cleanup_mocks')
+    parser.add_argument('--base', default=REPO_ROOT, help='repository root the page paths are relative to')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--report', help='write per-transform results as JSON')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine = Codemod(args.base)
+    for name in args.modules:
+        importlib.import_module(name).register(engine)
+    t0 = time.perf_counter()
+    results = engine.run(jobs=args.jobs)
+    elapsed = time.perf_counter() - t0
+    print_summary(results, elapsed)
+    if args.report:
+        write_report(args.report, results, elapsed)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Shared PostgreSQL connection handling for the Python scripts in scripts/.
+
+The DSN comes from DATABASE_URL (see .env.example); a .env file in the
+working directory is read if present. Connections get a connect timeout,
+a server-side statement_timeout, TCP keepalives and exponential-backoff
+retries, so a slow pooler handshake or a dropped connection does not fail
+the whole script. Scripts with several phases can share one pool instead
+of reconnecting in each phase:
+
+    from db_conn import connect, pooled_connection
+
+    conn = connect()
+    with pooled_connection() as conn:
+        ...
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+DSN_ENV = "DATABASE_URL"
+CONNECT_TIMEOUT = 10            # seconds
+STATEMENT_TIMEOUT_MS = 60_000
+RETRIES = 5
+BACKOFF = 0.5                   # first retry delay in seconds, doubled each attempt
+MAX_BACKOFF = 8.0
+
+KEEPALIVES = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+}
+
+_pool = None
+
+def load_dotenv(path=".env"):
+    """Populate os.environ from a KEY=value file without overriding existing vars."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            os.environ.setdefault(key.strip(), value.strip().strip('"\''))
+
+def get_dsn(env_var=DSN_ENV):
+    """Return the DSN from the environment (or .env), failing with a clear message."""
+    load_dotenv()
+    dsn = os.environ.get(env_var)
+    if not dsn:
+        raise RuntimeError(f"{env_var} is not set; export it or add it to .env (see .env.example)")
+    return dsn
+
+def connect_kwargs(connect_timeout=CONNECT_TIMEOUT, statement_timeout_ms=STATEMENT_TIMEOUT_MS, **kwargs):
+    """psycopg2.connect() keyword arguments with timeouts and keepalives applied."""
+    params = dict(KEEPALIVES, connect_timeout=connect_timeout)
+    if statement_timeout_ms:
+        options = kwargs.pop('options', '')
+        params['options'] = f"{options} -c statement_timeout={int(statement_timeout_ms)}".strip()
+    params.update(kwargs)
+    return params
+
+def connect(dsn=None, retries=RETRIES, backoff=BACKOFF, max_backoff=MAX_BACKOFF, **kwargs):
+    """Open a connection, retrying OperationalError with jittered exponential backoff.
+
+    Extra keyword arguments go through connect_kwargs(), so connect_timeout
+    and statement_timeout_ms can be overridden per call.
+    """
+    dsn = dsn or get_dsn()
+    params = connect_kwargs(**kwargs)
+    delay = backoff
+    for attempt in range(retries + 1):
+        try:
+            return psycopg2.connect(dsn, **params)
+        except psycopg2.OperationalError as e:
+            if attempt == retries:
+                raise
+            sleep = min(delay, max_backoff) * (1 + random.random() / 2)
+            print(f"  connect failed ({str(e).strip()}); retry {attempt + 1}/{retries} in {sleep:.1f}s")
+            time.sleep(sleep)
+            delay *= 2
+
+class RetryingConnectionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool whose new connections go through connect()."""
+
+    def __init__(self, minconn, maxconn, dsn=None, **kwargs):
+        self._connect_options = kwargs
+        super().__init__(minconn, maxconn, dsn or get_dsn())
+
+    def _connect(self, key=None):
+        conn = connect(*self._args, **self._connect_options)
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+        return conn
+
+def get_pool(dsn=None, minconn=1, maxconn=4, **kwargs):
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None or _pool.closed:
+        _pool = RetryingConnectionPool(minconn, maxconn, dsn, **kwargs)
+    return _pool
+
+@contextmanager
+def pooled_connection(dsn=None, **kwargs):
+    """Borrow a connection from the shared pool; it is rolled back if left mid-transaction."""
+    pool = get_pool(dsn, **kwargs)
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed and not conn.autocommit:
+            conn.rollback()
+        pool.putconn(conn)
+
+def close_pool():
+    global _pool
+    if _pool is not None and not _pool.closed:
+        _pool.closeall()
+    _pool = None
@@ -7,10 +7,52 @@ In Drizzle, the pattern is:
   
 We need to change "dbColumnName" to "db_column_name" where it's camelCase.
 Also need to change camelCase table names to snake_case.
+
+All rewrite rules are folded into a single alternation so each file is
+scanned once; matches are dispatched by rule name and the output is built
+from a list of chunks instead of re-creating the string once per rule.
 """
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
 import re
-import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_write import AtomicWriter, fsync_dirs, write_file
+
+# Types: varchar, text, integer, serial, boolean, decimal, timestamp, date, time, jsonb, real, customType
+TYPE_FUNCS = r'(?:varchar|text|integer|serial|boolean|decimal|timestamp|date|time|jsonb|real|vector)'
+
+# (kind, call pattern) - the quoted DB name follows the call's opening paren.
+# Order matters where rules overlap: pgEnum( must win over the generic *Enum( rule.
+SCHEMA_RULES = (
+    ('Table', r'pgTable\('),            # pgTable("tableName", ...)
+    ('Column', rf'{TYPE_FUNCS}\('),     # varchar("columnName", ...)
+    ('Enum', r'pgEnum\('),              # pgEnum("enumName", [...])
+    ('EnumCol', r'\w+Enum\('),          # planTypeEnum("planType")
+)
+
+SCHEMA_TOKEN_RE = re.compile('|'.join(
+    rf'(?P<{kind}>{call}(?P<{kind}_q>["\'])(?P<{kind}_name>[a-zA-Z_]+)(?P={kind}_q))'
+    for kind, call in SCHEMA_RULES
+))
+
+DEFAULT_MANIFEST = ".fix_schema_manifest.json"
 
+# Authoritative camelCase -> snake_case rename table. Loaded from --name-map
+# at startup; entries here win over the derived conversion.
+NAME_MAP = {}
+
+# Schema files are written atomically; directory fsyncs are left to the
+# parent process (fsync_dirs in __main__) so pool workers do not repeat them.
+WRITER = AtomicWriter(sync_dirs=False)
+
+@functools.lru_cache(maxsize=None)
 def camel_to_snake(name):
     """Convert camelCase to snake_case."""
     # Handle consecutive uppercase letters (e.g., "NPSScore" -> "nps_score")
@@ -22,99 +64,289 @@ def is_camel_case(s):
     """Check if a string is camelCase (has at least one uppercase letter after a lowercase)."""
     return bool(re.search(r'[a-z][A-Z]', s))
 
-def fix_schema_file(filepath):
-    with open(filepath, 'r') as f:
-        content = f.read()
-    
-    original = content
+@functools.lru_cache(maxsize=None)
+def _derived_name(name):
+    if not is_camel_case(name):
+        return None
+    return camel_to_snake(name)
+
+def target_name(name):
+    """Return the snake_case DB name for name, or None if it needs no rename."""
+    new_name = NAME_MAP.get(name)
+    if new_name is None:
+        new_name = _derived_name(name)
+    return new_name if new_name != name else None
+
+def load_name_map(path):
+    """Load a JSON rename table into NAME_MAP (a missing file is an empty table)."""
+    if path and os.path.exists(path):
+        with open(path, 'r') as f:
+            NAME_MAP.update(json.load(f))
+    return NAME_MAP
+
+def save_name_map(path, changes):
+    """Merge the renames found in this run into the JSON table at path."""
+    NAME_MAP.update((c[1], c[2]) for c in changes)
+    write_file(path, json.dumps(NAME_MAP, indent=2, sort_keys=True) + '\n')
+
+def _init_worker(name_map):
+    NAME_MAP.update(name_map)
+
+def new_rule_stats():
+    return {kind: {'matches': 0, 'renames': 0, 'seconds': 0.0} for kind, _ in SCHEMA_RULES}
+
+def rewrite_schema(content, first_line=1, stats=None):
+    """Rewrite camelCase DB names in one scan of content.
+
+    Returns (new_content, changes) where each change is a
+    (kind, old, new, line) tuple; first_line is the line number of the
+    first line in content. When a stats dict from new_rule_stats() is
+    given, per-rule match and rename counts and the time spent handling
+    each rule's matches are accumulated into it.
+    """
+    chunks = []
     changes = []
+    last = 0
+    line = first_line
+    line_pos = 0
+    for match in SCHEMA_TOKEN_RE.finditer(content):
+        if stats is not None:
+            t0 = time.perf_counter()
+        kind = match.lastgroup
+        name = match.group(f'{kind}_name')
+        new_name = target_name(name)
+        if new_name is not None:
+            start, end = match.span(f'{kind}_name')
+            line += content.count('\n', line_pos, start)
+            line_pos = start
+            changes.append((kind, name, new_name, line))
+            chunks.append(content[last:start])
+            chunks.append(new_name)
+            last = end
+        if stats is not None:
+            rule = stats[kind]
+            rule['matches'] += 1
+            rule['renames'] += new_name is not None
+            rule['seconds'] += time.perf_counter() - t0
+    if not changes:
+        return content, changes
+    chunks.append(content[last:])
+    return ''.join(chunks), changes
+
+def format_change(change):
+    kind, old, new = change[:3]
+    return f"{kind}: {old} -> {new}"
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def rules_digest():
+    """Digest of everything besides file content that affects the rewrite."""
+    payload = SCHEMA_TOKEN_RE.pattern + json.dumps(NAME_MAP, sort_keys=True)
+    return content_hash(payload)
+
+def load_manifest(path):
+    """Return {filepath: entry} from the manifest, or {} if it is stale or missing."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('rules') != rules_digest():
+        return {}
+    return manifest.get('files', {})
+
+def save_manifest(path, entries):
+    write_file(path, json.dumps({'rules': rules_digest(), 'files': entries}, indent=2, sort_keys=True) + '\n')
+
+def stream_rewrite_file(filepath, stats=None):
+    """Rewrite filepath line by line through a temp file in the same directory.
+
+    Every rule matches within a single line, so declarations can be rewritten
+    one line at a time and peak memory stays flat however large the file is.
+    The temp file is only renamed over the original when something changed.
+    Returns (changes, sha256 of the original, sha256 of the result, tmp_path);
+    tmp_path is None when nothing needs to be written.
+    """
+    before = hashlib.sha256()
+    after = hashlib.sha256()
+    changes = []
+    dirname = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix='.fix_schema.', dir=dirname)
+    try:
+        with open(filepath, 'r', newline='') as src, os.fdopen(fd, 'w', newline='') as dst:
+            for lineno, line in enumerate(src, 1):
+                before.update(line.encode('utf-8'))
+                new_line, line_changes = rewrite_schema(line, lineno, stats)
+                after.update(new_line.encode('utf-8'))
+                changes.extend(line_changes)
+                dst.write(new_line)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if not changes:
+        os.unlink(tmp_path)
+        tmp_path = None
+    return changes, before.hexdigest(), after.hexdigest(), tmp_path
+
+def _fix_schema_file_streaming(filepath, cached, dry_run, stats):
+    changes, digest, new_digest, tmp_path = stream_rewrite_file(filepath, stats)
+    if tmp_path and (dry_run or (cached and cached['sha256'] == digest)):
+        os.unlink(tmp_path)
+        tmp_path = None
+    if cached and cached['sha256'] == digest:
+        st = os.stat(filepath)
+        return None, dict(cached, size=st.st_size, mtime_ns=st.st_mtime_ns)
+    if tmp_path:
+        WRITER.replace(tmp_path, filepath)
+    st = os.stat(filepath)
+    entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': new_digest, 'changes': len(changes)}
+    return changes, entry
+
+def _fix_schema_file(filepath, cached, stream, dry_run, stats):
+    st = os.stat(filepath)
+    if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+        return None, cached
+    if stream:
+        return _fix_schema_file_streaming(filepath, cached, dry_run, stats)
     
-    # Pattern 1: Fix table names in pgTable("tableName", ...)
-    # Match pgTable("someTableName" or pgTable('someTableName'
-    def fix_table_name(match):
-        quote = match.group(1)
-        table_name = match.group(2)
-        if is_camel_case(table_name):
-            new_name = camel_to_snake(table_name)
-            changes.append(f"Table: {table_name} -> {new_name}")
-            return f'pgTable({quote}{new_name}{quote}'
-        return match.group(0)
-    
-    content = re.sub(r'pgTable\((["\'])([a-zA-Z_]+)\1', fix_table_name, content)
-    
-    # Pattern 2: Fix column names in type definitions
-    # Match patterns like: type("columnName" or type('columnName'
-    # These are the DB column names inside quotes after type functions
-    # Types: varchar, text, integer, serial, boolean, decimal, timestamp, date, time, jsonb, real, customType
-    type_funcs = r'(?:varchar|text|integer|serial|boolean|decimal|timestamp|date|time|jsonb|real|vector)'
-    
-    def fix_column_name(match):
-        prefix = match.group(1)  # the type function call
-        quote = match.group(2)
-        col_name = match.group(3)
-        suffix = match.group(4)
-        
-        if is_camel_case(col_name):
-            new_name = camel_to_snake(col_name)
-            changes.append(f"Column: {col_name} -> {new_name}")
-            return f'{prefix}{quote}{new_name}{quote}{suffix}'
-        return match.group(0)
-    
-    # Match type("colName", ...) or type("colName")
-    content = re.sub(
-        rf'({type_funcs}\()(["\'])([a-zA-Z_]+)\2(\)?)',
-        fix_column_name,
-        content
-    )
-    
-    # Pattern 3: Fix pgEnum names
-    def fix_enum_name(match):
-        quote = match.group(1)
-        enum_name = match.group(2)
-        if is_camel_case(enum_name):
-            new_name = camel_to_snake(enum_name)
-            changes.append(f"Enum: {enum_name} -> {new_name}")
-            return f'pgEnum({quote}{new_name}{quote}'
-        return match.group(0)
-    
-    content = re.sub(r'pgEnum\((["\'])([a-zA-Z_]+)\1', fix_enum_name, content)
-    
-    # Pattern 4: Fix enum usage in column definitions like: planTypeEnum("planType")
-    def fix_enum_column(match):
-        enum_var = match.group(1)
-        quote = match.group(2)
-        col_name = match.group(3)
-        if is_camel_case(col_name):
-            new_name = camel_to_snake(col_name)
-            changes.append(f"EnumCol: {col_name} -> {new_name}")
-            return f'{enum_var}({quote}{new_name}{quote}'
-        return match.group(0)
+    with open(filepath, 'r') as f:
+        content = f.read()
+    digest = content_hash(content)
+    if cached and cached['sha256'] == digest:
+        return None, dict(cached, size=st.st_size, mtime_ns=st.st_mtime_ns)
     
-    # Match enumVarName("colName")
-    content = re.sub(
-        r'(\w+Enum)\((["\'])([a-zA-Z_]+)\2',
-        fix_enum_column,
-        content
-    )
+    content, changes = rewrite_schema(content, stats=stats)
     
-    if content != original:
-        with open(filepath, 'w') as f:
-            f.write(content)
+    if changes and not dry_run:
+        WRITER.write(filepath, content)
+        digest = content_hash(content)
+        st = os.stat(filepath)
+    entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest, 'changes': len(changes)}
+    return changes, entry
+
+def fix_schema_file(filepath, cached=None, stream=False, dry_run=False):
+    """Rewrite one schema file in place.
+
+    cached is the file's manifest entry from the previous run. Returns
+    (changes, entry, stats); changes is None when the file was skipped
+    because its stat or content hash still matches the entry. With
+    stream=True the file is never held in memory as a whole (see
+    stream_rewrite_file); with dry_run=True nothing is written. stats holds
+    the wall time for the file and the per-rule counters and timings.
+    """
+    rules = new_rule_stats()
+    t0 = time.perf_counter()
+    changes, entry = _fix_schema_file(filepath, cached, stream, dry_run, rules)
+    stats = {'seconds': time.perf_counter() - t0, 'rules': rules}
+    return changes, entry, stats
+
+def report_file(filepath, changes):
+    if changes is None:
+        print(f"Unchanged since last run: {filepath}")
+    elif changes:
         print(f"Fixed {filepath}: {len(changes)} changes")
         # Print unique changes
-        unique_changes = sorted(set(changes))
+        unique_changes = sorted(set(format_change(c) for c in changes))
         for c in unique_changes:
             print(f"  {c}")
     else:
         print(f"No changes needed for {filepath}")
-    
-    return len(changes)
+
+def fix_schema_files(files, jobs=1, manifest=None, stream=False, dry_run=False, force=False):
+    """Fix every file, fanning out to a process pool when jobs > 1.
+
+    manifest maps filepath -> entry from the previous run and is updated in
+    place; entries for files not in this run are kept. With force=True no
+    file is skipped as unchanged. Returns (filepath, changes, stats) per file. Results come back in
+    input order regardless of which worker finishes first, so the printed
+    summary is the same as a serial run.
+    """
+    if manifest is None:
+        manifest = {}
+    cached = [None if force else manifest.get(f) for f in files]
+    streams = [stream] * len(files)
+    dry_runs = [dry_run] * len(files)
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(NAME_MAP,)) as pool:
+            results = list(pool.map(fix_schema_file, files, cached, streams, dry_runs))
+    else:
+        results = [fix_schema_file(f, c, stream, dry_run) for f, c in zip(files, cached)]
+    for filepath, (_, entry, _) in zip(files, results):
+        manifest[filepath] = entry
+    return [(filepath, changes, stats) for filepath, (changes, _, stats) in zip(files, results)]
+
+def build_report(results, dry_run, seconds):
+    """Structured JSON report: every rename with its location plus timings."""
+    rules = new_rule_stats()
+    files = []
+    renames = []
+    for filepath, changes, stats in results:
+        for kind, rule in stats['rules'].items():
+            for key, value in rule.items():
+                rules[kind][key] += value
+        files.append({
+            'path': filepath,
+            'skipped': changes is None,
+            'changes': len(changes or []),
+            'seconds': stats['seconds'],
+            'rules': stats['rules'],
+        })
+        for kind, old, new, line in changes or []:
+            renames.append({'file': filepath, 'line': line, 'kind': kind, 'old': old, 'new': new})
+    return {
+        'dry_run': dry_run,
+        'total_changes': len(renames),
+        'seconds': seconds,
+        'rules': rules,
+        'files': files,
+        'renames': renames,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help='schema files (default: drizzle/schema.ts)')
+    parser.add_argument('--all', action='store_true', help='process every drizzle/*.ts module')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--name-map', help='JSON rename table to load and update (identifier -> db name)')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help=f'incremental-run manifest (default: {DEFAULT_MANIFEST})')
+    parser.add_argument('--force', action='store_true', help='reprocess every given file even if the manifest says unchanged')
+    parser.add_argument('--stream', action='store_true',
+                        help='rewrite line by line via a temp file (flat memory for very large schemas)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report renames without writing files (implies --force)')
+    parser.add_argument('--report', help='write a JSON report of renames, rule counts and timings')
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    files = sys.argv[1:] if len(sys.argv) > 1 else [
-        "drizzle/schema.ts",
-    ]
+    args = parse_args()
+    files = list(args.files)
+    if args.all:
+        files.extend(sorted(glob.glob("drizzle/*.ts")))
+    if not files:
+        files = ["drizzle/schema.ts"]
+    files = [os.path.normpath(f) for f in files]
+    load_name_map(args.name_map)
+    # Always start from the saved manifest so a --force run on some files keeps the others' entries
+    manifest = load_manifest(args.manifest)
+    t0 = time.perf_counter()
+    results = fix_schema_files(files, jobs=args.jobs, manifest=manifest, stream=args.stream,
+                               dry_run=args.dry_run, force=args.force or args.dry_run)
+    elapsed = time.perf_counter() - t0
     total = 0
-    for f in files:
-        total += fix_schema_file(f)
+    all_changes = []
+    for filepath, changes, _ in results:
+        report_file(filepath, changes)
+        if changes:
+            total += len(changes)
+            all_changes.extend(changes)
+    if not args.dry_run:
+        fsync_dirs(os.path.dirname(os.path.abspath(f)) for f, changes, _ in results if changes)
+        if args.name_map:
+            save_name_map(args.name_map, all_changes)
+        save_manifest(args.manifest, manifest)
+    if args.report:
+        write_file(args.report, json.dumps(build_report(results, args.dry_run, elapsed), indent=2,
+                                           ensure_ascii=False) + '\n')
     print(f"\nTotal changes: {total}")
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Generate production-scale synthetic clinic data as COPY-ready CSV files.
+
+Tables are generated parent-first (tenants, staff, products, customers,
+then appointments, inventory transactions and LINE webhook events) with
+explicit ids, so every foreign key points at a row of the same tenant.
+Per-tenant sizes are skewed (a few large clinics, many small ones), and
+each owner table's ids are contiguous per tenant. A child row therefore
+picks its tenant first and then a parent id inside that tenant's range,
+all with vectorized NumPy sampling.
+
+Rows are written in fixed-size chunks, so memory stays flat regardless of
+scale. The output directory loads directly with
+
+  python scripts/seed_db.py --csv <out>
+
+Because ids are explicit, a sequences.sql is written next to the CSVs to
+move each serial sequence past the generated ids (run it after loading).
+
+The generated columns are checked against the table catalog parsed from
+drizzle/schema.ts before anything is written.
+
+  python scripts/gen_load_data.py --out /tmp/load --scale 1      # ~10M rows
+  python scripts/gen_load_data.py --out /tmp/load --rows customers=100000 --rows appointments=100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from schema_drift import parse_drizzle
+
+# Row counts at --scale 1 (about 10M rows in total)
+BASE_ROWS = {
+    'tenants': 200,
+    'staff': 4_000,
+    'products': 6_000,
+    'customers': 1_500_000,
+    'appointments': 4_500_000,
+    'inventory_transactions': 1_500_000,
+    'line_webhook_events': 2_500_000,
+}
+
+START = np.datetime64('2023-01-01T00:00:00', 's')
+DAYS = 3 * 365
+
+SURNAMES = np.array(list('陳林黃張李王吳劉蔡楊許鄭謝郭洪曾邱廖賴周'))
+GIVEN = np.array(['美玲', '雅婷', '怡君', '志明', '佳穎', '淑芬', '建宏', '雅琪', '美華', '小萱',
+                  '家豪', '冠宇', '宜蓁', '品妤', '承恩', '欣怡', '詩涵', '柏翰', '子晴', '宥廷'])
+PRODUCT_NAMES = np.array(['玻尿酸注射', '肉毒桿菌', '雷射美白', '皮秒雷射', '音波拉提', '電波拉皮',
+                          '水光針', '淨膚雷射', '飛梭雷射', '果酸換膚', '微針', '晶亮瓷'])
+SLOTS = np.array([f"{h:02d}:{m:02d}:00" for h in range(9, 21) for m in (0, 30)])
+
+def choice(rng, values, n, p=None):
+    return np.asarray(values)[rng.choice(len(values), size=n, p=p)]
+
+def money(values):
+    return np.char.mod('%.2f', np.round(values, 2))
+
+def timestamps(rng, n, days=DAYS):
+    return (START + rng.integers(0, days * 86400, size=n).astype('timedelta64[s]')).astype(str)
+
+def dates(rng, n, days=DAYS):
+    return (START.astype('datetime64[D]') + rng.integers(0, days, size=n).astype('timedelta64[D]')).astype(str)
+
+def csv_quote(values):
+    """Quote a string column for CSV (only needed where values may contain , or ")."""
+    return np.char.add(np.char.add('"', np.char.replace(values, '"', '""')), '"')
+
+class Owners:
+    """Contiguous per-tenant id ranges for one owner table."""
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.starts = np.concatenate(([1], 1 + np.cumsum(counts)[:-1]))
+
+    def tenant_of(self, ids):
+        """Tenant id (1-based) owning each of the given owner ids."""
+        return np.searchsorted(self.starts, ids, side='right')
+
+    def pick(self, rng, tenants):
+        """One random owner id per entry of tenants (1-based tenant ids)."""
+        idx = tenants - 1
+        return self.starts[idx] + (rng.random(len(tenants)) * self.counts[idx]).astype(np.int64)
+
+class Generator:
+    """Vectorized generators for each table, sharing tenant weights and id ranges."""
+
+    def __init__(self, rows, seed):
+        self.rows = rows
+        self.rng = np.random.default_rng(seed)
+        n = rows['tenants']
+        # Heavy-tailed clinic sizes: a few chains, many single clinics
+        weights = self.rng.lognormal(mean=0.0, sigma=1.2, size=n)
+        self.weights = weights / weights.sum()
+        self.owners = {}
+        for table in ('staff', 'products', 'customers'):
+            counts = self.rng.multinomial(rows[table] - n, self.weights) + 1   # at least one each
+            self.owners[table] = Owners(counts)
+
+    def tenant_sample(self, n):
+        return self.rng.choice(len(self.weights), size=n, p=self.weights) + 1
+
+    def tenants(self, ids):
+        n = len(ids)
+        return {
+            'id': ids.astype(str),
+            'name': np.char.add('診所 ', ids.astype(str)),
+            'slug': np.char.add('clinic-', ids.astype(str)),
+            'timezone': np.full(n, 'Asia/Taipei'),
+            'currency': np.full(n, 'TWD'),
+            'is_active': np.full(n, 't'),
+            'created_at': timestamps(self.rng, n),
+            'updated_at': timestamps(self.rng, n),
+        }
+
+    def _owned(self, table, ids):
+        return self.owners[table].tenant_of(ids)
+
+    def staff(self, ids):
+        n = len(ids)
+        rng = self.rng
+        return {
+            'id': ids.astype(str),
+            'organization_id': self._owned('staff', ids).astype(str),
+            'name': np.char.add(choice(rng, SURNAMES, n), choice(rng, GIVEN, n)),
+            'position': choice(rng, ['醫師', '護理師', '美容師', '諮詢師', '櫃台'], n, [.15, .3, .3, .15, .1]),
+            'hire_date': dates(rng, n),
+            'salary': money(rng.normal(48000, 9000, n).clip(28000)),
+            'salary_type': np.full(n, 'monthly'),
+            'is_active': choice(rng, ['t', 'f'], n, [.92, .08]),
+            'created_at': timestamps(rng, n),
+            'updated_at': timestamps(rng, n),
+        }
+
+    def products(self, ids):
+        n = len(ids)
+        rng = self.rng
+        price = rng.lognormal(8.7, 0.7, n).clip(500, 200000)
+        return {
+            'id': ids.astype(str),
+            'organization_id': self._owned('products', ids).astype(str),
+            'name': choice(rng, PRODUCT_NAMES, n),
+            'type': choice(rng, ['service', 'product', 'package'], n, [.6, .3, .1]),
+            'price': money(price),
+            'cost_price': money(price * rng.uniform(0.2, 0.5, n)),
+            'duration': choice(rng, ['30', '45', '60', '90'], n),
+            'stock': rng.integers(0, 500, n).astype(str),
+            'is_active': choice(rng, ['t', 'f'], n, [.95, .05]),
+            'created_at': timestamps(rng, n),
+            'updated_at': timestamps(rng, n),
+        }
+
+    def customers(self, ids):
+        n = len(ids)
+        rng = self.rng
+        phone = np.char.add('09', np.char.zfill(rng.integers(0, 10**8, n).astype(str), 8))
+        return {
+            'id': ids.astype(str),
+            'organization_id': self._owned('customers', ids).astype(str),
+            'name': np.char.add(choice(rng, SURNAMES, n), choice(rng, GIVEN, n)),
+            'phone': phone,
+            'email': np.char.add(np.char.add('c', ids.astype(str)), '@example.com'),
+            'gender': choice(rng, ['female', 'male', 'other'], n, [.78, .2, .02]),
+            'birthday': (np.datetime64('1960-01-01') + rng.integers(0, 45 * 365, n).astype('timedelta64[D]')).astype(str),
+            'member_level': choice(rng, ['bronze', 'silver', 'gold', 'platinum', 'diamond'], n, [.5, .25, .15, .07, .03]),
+            'total_spent': money(rng.lognormal(9.5, 1.3, n)),
+            'visit_count': rng.poisson(6, n).astype(str),
+            'source': choice(rng, ['LINE', 'Instagram', 'Facebook', 'Google', '朋友介紹'], n),
+            'is_active': choice(rng, ['t', 'f'], n, [.97, .03]),
+            'created_at': timestamps(rng, n),
+            'updated_at': timestamps(rng, n),
+        }
+
+    def appointments(self, ids):
+        n = len(ids)
+        rng = self.rng
+        tenants = self.tenant_sample(n)
+        slot = rng.integers(0, len(SLOTS) - 2, n)
+        return {
+            'id': ids.astype(str),
+            'organization_id': tenants.astype(str),
+            'customer_id': self.owners['customers'].pick(rng, tenants).astype(str),
+            'staff_id': self.owners['staff'].pick(rng, tenants).astype(str),
+            'product_id': self.owners['products'].pick(rng, tenants).astype(str),
+            'appointment_date': dates(rng, n),
+            'start_time': SLOTS[slot],
+            'end_time': SLOTS[slot + rng.integers(1, 3, n)],
+            'status': choice(rng, ['pending', 'confirmed', 'arrived', 'in_progress', 'completed', 'cancelled', 'no_show'],
+                             n, [.08, .12, .02, .01, .62, .11, .04]),
+            'source': choice(rng, ['line', 'web', 'phone', 'walk_in'], n, [.55, .2, .15, .1]),
+            'reminder_sent': choice(rng, ['t', 'f'], n, [.7, .3]),
+            'created_at': timestamps(rng, n),
+            'updated_at': timestamps(rng, n),
+        }
+
+    def inventory_transactions(self, ids):
+        n = len(ids)
+        rng = self.rng
+        tenants = self.tenant_sample(n)
+        kind = rng.choice(4, size=n, p=[.3, .55, .1, .05])
+        quantity = rng.integers(1, 50, n) * np.where(kind == 1, -1, 1)
+        unit_cost = rng.lognormal(6.5, 0.8, n)
+        return {
+            'id': ids.astype(str),
+            'organization_id': tenants.astype(str),
+            'product_id': self.owners['products'].pick(rng, tenants).astype(str),
+            'transaction_type': np.array(['purchase', 'sale', 'adjustment', 'return'])[kind],
+            'quantity': quantity.astype(str),
+            'unit_cost': money(unit_cost),
+            'total_cost': money(unit_cost * np.abs(quantity)),
+            'staff_id': self.owners['staff'].pick(rng, tenants).astype(str),
+            'transaction_date': timestamps(rng, n),
+            'created_at': timestamps(rng, n),
+        }
+
+    def line_webhook_events(self, ids):
+        n = len(ids)
+        rng = self.rng
+        tenants = self.tenant_sample(n)
+        event = choice(rng, ['message', 'follow', 'unfollow', 'postback'], n, [.8, .1, .03, .07])
+        source_id = np.char.add('U', np.char.zfill(rng.integers(0, 10**12, n).astype(str), 32))
+        payload = np.char.add(np.char.add(np.char.add('{"type": "', event), '", "source": {"userId": "'), source_id)
+        processed = rng.random(n) < 0.97
+        created = timestamps(rng, n)
+        return {
+            'id': ids.astype(str),
+            'organization_id': tenants.astype(str),
+            'event_type': event,
+            'source_type': np.full(n, 'user'),
+            'source_id': source_id,
+            'message_type': np.where(event == 'message', 'text', ''),
+            'raw_payload': csv_quote(np.char.add(payload, '"}}')),
+            'is_processed': np.where(processed, 't', 'f'),
+            'processed_at': np.where(processed, created, ''),
+            'created_at': created,
+        }
+
+def check_catalog(generator, catalog):
+    """Fail early if a generated column no longer exists in drizzle/schema.ts."""
+    problems = []
+    sample = np.arange(1, 3)
+    for table in BASE_ROWS:
+        if table not in catalog:
+            problems.append(f"table {table} not found in the Drizzle schema")
+            continue
+        columns = getattr(generator, table)(sample).keys()
+        missing = [c for c in columns if c not in catalog[table]]
+        if missing:
+            problems.append(f"{table}: unknown columns {', '.join(missing)}")
+    return problems
+
+def write_table(generator, table, total, out_dir, chunk_size):
+    """Write one table in chunks; returns the number of rows written."""
+    path = os.path.join(out_dir, f"{table}.csv")
+    func = getattr(generator, table)
+    with open(path, 'w', newline='') as f:
+        header_written = False
+        for start in range(1, total + 1, chunk_size):
+            ids = np.arange(start, min(start + chunk_size, total + 1), dtype=np.int64)
+            columns = func(ids)
+            if not header_written:
+                f.write(','.join(columns) + '\n')
+                header_written = True
+            # Empty strings are NULL in COPY's CSV format
+            lines = map(','.join, zip(*(col.tolist() for col in columns.values())))
+            f.write('\n'.join(lines))
+            f.write('\n')
+    return total
+
+def parse_rows(values, scale):
+    rows = {t: max(1, int(n * scale)) for t, n in BASE_ROWS.items()}
+    for item in values:
+        table, _, count = item.partition('=')
+        if table not in rows or not count.isdigit():
+            raise SystemExit(f"--rows expects table=N with table in {', '.join(rows)}")
+        rows[table] = int(count)
+    # Every tenant needs at least one staff member, product and customer
+    for table in ('staff', 'products', 'customers'):
+        rows[table] = max(rows[table], rows['tenants'])
+    return rows
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--out', required=True, help='output directory for <table>.csv files')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for the default row counts (1.0 ~ 10M rows)')
+    parser.add_argument('--rows', action='append', default=[], help='override one table, e.g. customers=100000')
+    parser.add_argument('--chunk-size', type=int, default=200_000, help='rows generated and written per chunk')
+    parser.add_argument('--seed', type=int, default=42, help='random seed (output is deterministic per seed)')
+    parser.add_argument('--schema', nargs='+', default=['drizzle/schema.ts'], help='Drizzle modules to validate against')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = parse_rows(args.rows, args.scale)
+    generator = Generator(rows, args.seed)
+    problems = check_catalog(generator, parse_drizzle(args.schema, lambda n: n))
+    if problems:
+        print("Generated columns do not match the schema:")
+        for p in problems:
+            print(f"  {p}")
+        sys.exit(1)
+
+    os.makedirs(args.out, exist_ok=True)
+    t0 = time.perf_counter()
+    for table, total in rows.items():
+        t1 = time.perf_counter()
+        write_table(generator, table, total, args.out, args.chunk_size)
+        elapsed = time.perf_counter() - t1
+        print(f"  {table:<28} {total:>11,} rows {elapsed:>8.1f}s ({total / max(elapsed, 1e-9):>10,.0f} rows/s)")
+    with open(os.path.join(args.out, 'sequences.sql'), 'w') as f:
+        for table, total in rows.items():
+            f.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), {total});\n")
+    print(f"\nGenerated {sum(rows.values()):,} rows in {time.perf_counter() - t0:.1f}s -> {args.out}")
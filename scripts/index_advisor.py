@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Propose indexes for the Drizzle schema from its column naming conventions.
+
+The schema declares no indexes besides a handful in schema_performance.ts,
+so every tenant-scoped query is a sequential scan. For each pgTable this
+looks at:
+
+  tenant key      organization_id / tenant_id / clinic_id
+  FK-like columns *_id / *Id (other than the primary key and tenant key)
+  sort column     the table's event date (appointments.appointment_date,
+                  inventory_transactions.transaction_date, ...), falling
+                  back to created_at
+  status columns  columns named status / *_status (other enums are not
+                  assumed to be list filters)
+
+and proposes:
+
+  (tenant, sort)            list a tenant's rows newest first
+  (tenant, status, sort)    the same list filtered by status
+  (fk)                      joins, lookups and ON DELETE checks by parent
+
+Candidates that are a prefix of another candidate or of an existing index
+are dropped. --against resolves names against a SQL dump that may still
+use the pre-fix_schema camelCase columns (an index follows a later column
+rename, so it can be built before or after the rename migration). Output
+is a Drizzle index() callback per table and an idempotent
+CREATE INDEX CONCURRENTLY IF NOT EXISTS migration:
+
+  python scripts/index_advisor.py --all --sql migrations/tenant_indexes.sql \\
+      --drizzle /tmp/indexes.ts --json /tmp/indexes.json
+"""
+import argparse
+import glob
+import hashlib
+import json
+import re
+
+from atomic_write import write_file
+from fix_schema import camel_to_snake
+from schema_drift import TS_COLUMN_RE, TS_TABLE_RE, parse_sql, ts_column_type
+
+TENANT_KEYS = ('organization_id', 'tenant_id', 'clinic_id')
+FK_RE = re.compile(r'(?:_id|[a-z]Id)$')
+STATUS_RE = re.compile(r'(?:^|_)status$')
+# Dates that describe validity windows or bookkeeping rather than the row's event.
+NON_SORT_RE = re.compile(r'^(?:updated|deleted|expires|trial_ends|token_expires|valid)_|^(?:last|next)_|'
+                         r'(?:expiry|birth)_?date$|^birthday$|_until$')
+MAX_IDENT = 63
+
+# export const appointments = pgTable("appointments", {
+TS_EXPORT_RE = re.compile(r'export const (\w+)\s*=\s*pgTable\(')
+TS_FIELD_RE = re.compile(r'^\s*(\w+)\s*:')
+# idx: index("name").on(table.a, table.b)
+TS_INDEX_RE = re.compile(r'(?:uniqueIndex|index)\((["\'])(\w+)\1\)\.on\(([^)]*)\)')
+
+def parse_tables(paths):
+    """[{name, var, path, columns: {db: {field, type, not_null, pk, unique}}, indexes: [[db,...]]}]"""
+    tables = []
+    for path in paths:
+        table = None
+        var = None
+        with open(path, 'r') as f:
+            for line in f:
+                export = TS_EXPORT_RE.search(line)
+                if export:
+                    var = export.group(1)
+                match = TS_TABLE_RE.search(line)
+                if match:
+                    table = {'name': match.group(2), 'var': var, 'path': path, 'columns': {}, 'indexes': []}
+                    tables.append(table)
+                    continue
+                if table is None:
+                    continue
+                for idx in TS_INDEX_RE.finditer(line):
+                    fields = [f.strip().split('.')[-1] for f in idx.group(3).split(',')]
+                    by_field = {c['field']: name for name, c in table['columns'].items()}
+                    table['indexes'].append([by_field.get(f, f) for f in fields])
+                if line.startswith('}'):
+                    if not line.startswith('}, ('):
+                        table = None
+                    continue
+                col = TS_COLUMN_RE.match(line)
+                if col:
+                    func, _, name, options, rest = col.groups()
+                    table['columns'][name] = {
+                        'field': TS_FIELD_RE.match(line).group(1),
+                        'type': ts_column_type(func, options),
+                        'not_null': '.notNull()' in rest or '.primaryKey()' in rest or func == 'serial',
+                        'pk': '.primaryKey()' in rest,
+                        'unique': '.unique()' in rest,
+                    }
+    return tables
+
+def _words(name):
+    return set(camel_to_snake(name).split('_'))
+
+def _stems(table_name):
+    return {w[:-1] if w.endswith('s') else w for w in camel_to_snake(table_name).split('_')}
+
+def sort_column(table):
+    """Best column to order a tenant's rows by, or None."""
+    stems = _stems(table['name'])
+    best = None
+    best_score = 0
+    for name, col in table['columns'].items():
+        snake = camel_to_snake(name)
+        if not (col['type'].startswith('timestamp') or col['type'] == 'date'):
+            continue
+        if NON_SORT_RE.search(snake):
+            continue
+        if snake == 'created_at':
+            score = 1
+        elif _words(name) & stems:
+            score = 3
+        elif col['not_null']:
+            score = 2
+        else:
+            continue
+        if score > best_score:
+            best, best_score = name, score
+    return best
+
+def tenant_key(table):
+    for name in table['columns']:
+        if camel_to_snake(name) in TENANT_KEYS:
+            return name
+    return None
+
+def index_name(table, columns):
+    name = '_'.join([table] + [camel_to_snake(c) for c in columns] + ['idx'])
+    if len(name) > MAX_IDENT:
+        digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+        name = f"{name[:MAX_IDENT - 9]}_{digest}"
+    return name
+
+def _is_prefix(short, long):
+    return len(short) <= len(long) and list(long[:len(short)]) == list(short)
+
+def propose(table, existing_indexes=()):
+    """Candidate indexes for one table: [{'columns': [...], 'reason': str}].
+
+    existing_indexes adds indexes declared for the same table elsewhere
+    (some tables are declared in more than one schema file).
+    """
+    cols = table['columns']
+    tenant = tenant_key(table)
+    sort = sort_column(table)
+    statuses = [n for n in cols if STATUS_RE.search(camel_to_snake(n))]
+    candidates = []
+    if tenant and not cols[tenant]['pk']:
+        candidates.append(([tenant, sort] if sort else [tenant], 'tenant key' + (f', sorted by {sort}' if sort else '')))
+        for status in statuses:
+            candidates.append(([tenant, status] + ([sort] if sort else []), f'tenant key filtered by {status}'))
+    for name, col in cols.items():
+        if name == tenant or col['pk'] or col['unique'] or camel_to_snake(name) == 'id':
+            continue
+        if FK_RE.search(name):
+            candidates.append(([name], 'FK-like column'))
+    existing = list(existing_indexes) + [[n] for n, c in cols.items() if c['pk'] or c['unique']]
+    kept = []
+    for columns, reason in candidates:
+        others = [c for c, _ in candidates if c != columns] + existing
+        if any(_is_prefix(columns, other) for other in others):
+            continue
+        if columns not in [k['columns'] for k in kept]:
+            kept.append({'columns': columns, 'reason': reason})
+    for k in kept:
+        k['name'] = index_name(table['name'], k['columns'])
+    return kept
+
+def advise(tables):
+    """Proposals for every table, each (table, columns) pair at most once."""
+    existing = {}
+    for t in tables:
+        existing.setdefault(t['name'], []).extend(t['indexes'])
+    proposals = []
+    seen = set()
+    for t in tables:
+        for p in propose(t, existing[t['name']]):
+            key = (t['name'], tuple(p['columns']))
+            if key not in seen:
+                seen.add(key)
+                proposals.append(dict(table=t['name'], var=t['var'], path=t['path'], **p))
+    return proposals
+
+def resolve_against(proposals, sql_path):
+    """Map proposals onto the table/column names used in a SQL dump.
+
+    The dump may predate fix_schema's renames (camelCase columns), so names
+    are matched after snake_case normalization. Sets sql_table/sql_columns
+    on each proposal that resolves; returns (resolved, dropped).
+    """
+    catalog = {}
+    for table, columns in parse_sql(sql_path, lambda n: n).items():
+        catalog[camel_to_snake(table)] = (table, {camel_to_snake(c): c for c in columns})
+    resolved, dropped = [], []
+    for p in proposals:
+        table = catalog.get(camel_to_snake(p['table']))
+        columns = [table[1].get(camel_to_snake(c)) for c in p['columns']] if table else [None]
+        if None in columns:
+            dropped.append(p)
+            continue
+        resolved.append(dict(p, sql_table=table[0], sql_columns=columns))
+    return resolved, dropped
+
+def _key(columns, fields):
+    parts = [fields[c] for c in columns]
+    return parts[0] + ''.join(p[:1].upper() + p[1:] for p in parts[1:]) + 'Idx'
+
+def render_drizzle(tables, proposals):
+    """index() callbacks per table, to paste as pgTable's third argument."""
+    out = ['// Proposed indexes (scripts/index_advisor.py). Add `index` to the',
+           '// drizzle-orm/pg-core import; merge into an existing callback if the table has one.']
+    by_table = {}
+    for p in proposals:
+        by_table.setdefault((p['path'], p['table']), []).append(p)
+    for t in tables:
+        props = by_table.get((t['path'], t['name']))
+        if not props:
+            continue
+        fields = {name: c['field'] for name, c in t['columns'].items()}
+        out.append('')
+        out.append(f"// {t['path']}: export const {t['var']} = pgTable(\"{t['name']}\", {{ ... }}")
+        out.append('}, (table) => ({')
+        for p in props:
+            on = ', '.join(f"table.{fields[c]}" for c in p['columns'])
+            out.append(f"  {_key(p['columns'], fields)}: index(\"{p['name']}\").on({on}),")
+        out.append('}));')
+    return '\n'.join(out) + '\n'
+
+def render_sql(proposals):
+    """Idempotent migration; CONCURRENTLY cannot run inside a transaction block."""
+    out = [
+        '-- ============================================',
+        '-- Tenant / FK / sort indexes proposed by scripts/index_advisor.py',
+        '-- 此檔案為冪等設計，可安全重複執行',
+        '-- Run outside a transaction (e.g. psql -f), one statement at a time:',
+        '-- CREATE INDEX CONCURRENTLY does not block writes but cannot run in a',
+        '-- transaction block. A failed build leaves an INVALID index that',
+        '-- IF NOT EXISTS will skip; drop it and re-run.',
+        '-- ============================================',
+    ]
+    table = None
+    for p in proposals:
+        if p['table'] != table:
+            table = p['table']
+            out.append('')
+            out.append(f'-- {table}')
+        cols = ', '.join(f'"{c}"' for c in p.get('sql_columns', p['columns']))
+        out.append(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{p["name"]}" ON "{p.get("sql_table", table)}" ({cols});')
+    return '\n'.join(out) + '\n'
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help='Drizzle schema files (default: drizzle/schema.ts)')
+    parser.add_argument('--all', action='store_true', help='analyze every drizzle/*.ts file')
+    parser.add_argument('--sql', help='write the CREATE INDEX CONCURRENTLY migration here (default: stdout)')
+    parser.add_argument('--drizzle', help='write the Drizzle index() callbacks here')
+    parser.add_argument('--json', help='write the proposals as JSON (input for index_bench.py)')
+    parser.add_argument('--against', metavar='SQL_FILE',
+                        help='emit the migration with the names used in this SQL schema dump '
+                             '(e.g. yokage-full-schema.sql) and drop proposals it cannot resolve')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    files = list(args.files)
+    if args.all:
+        files.extend(sorted(glob.glob("drizzle/*.ts")))
+    if not files:
+        files = ["drizzle/schema.ts"]
+    tables = parse_tables(files)
+    proposals = advise(tables)
+    if args.against:
+        proposals, dropped = resolve_against(proposals, args.against)
+        print(f"{len(dropped)} proposals dropped: table or column not in {args.against}")
+    sql = render_sql(proposals)
+    if args.sql:
+        write_file(args.sql, sql)
+    else:
+        print(sql)
+    if args.drizzle:
+        write_file(args.drizzle, render_drizzle(tables, proposals))
+    if args.json:
+        write_file(args.json, json.dumps(proposals, indent=2, ensure_ascii=False) + '\n')
+    indexed = len({(p['path'], p['table']) for p in proposals})
+    tenant = sum(1 for t in tables if tenant_key(t))
+    print(f"Tables: {len(tables)} ({tenant} tenant-scoped), proposed indexes: {len(proposals)} on {indexed} tables")
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Measure candidate indexes against representative tenant queries.
+
+index_advisor.py proposes indexes from naming conventions; this checks
+whether they pay off. It creates a throwaway database next to the one in
+DATABASE_URL, loads yokage-full-schema.sql into it statement by statement
+(statements that need missing extensions or schemas are skipped and
+counted), and fills the queried tables with gen_load_data.py's synthetic
+rows at the requested scale, COPYed in chunks. Generated snake_case
+columns are mapped onto the dump's names (which may still be camelCase).
+
+Each query in QUERIES then runs under EXPLAIN (ANALYZE, BUFFERS) with no
+candidate index, and again with each candidate on its table built alone.
+A candidate is credited with the median execution time it saves on the
+queries whose plan uses it, and candidates are ranked by time saved per
+MB of index:
+
+  python scripts/index_bench.py --scale 0.02 --report /tmp/index_bench.json
+  python scripts/index_advisor.py --all --json /tmp/idx.json --against yokage-full-schema.sql
+  python scripts/index_bench.py --candidates /tmp/idx.json --keep
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from psycopg2.extensions import make_dsn, parse_dsn
+
+from atomic_write import write_file
+from db_conn import connect, get_dsn
+from fix_schema import camel_to_snake
+from gen_load_data import Generator, parse_rows
+from index_advisor import advise, index_name, parse_tables
+from schema_drift import parse_sql
+from seed_db import split_statements
+
+SCHEMA_SQL = "yokage-full-schema.sql"
+CHUNK_SIZE = 100_000
+BENCH_DB = "index_bench"
+
+# Representative tenant queries. {name} placeholders are snake_case
+# identifiers resolved against the loaded schema; "params" picks concrete
+# values from the generated data (the busiest tenant, so plans face the
+# largest per-tenant row counts).
+QUERIES = [
+    {
+        'name': 'appointments by org and date',
+        'table': 'appointments',
+        'params': 'SELECT {organization_id} AS org FROM {table} GROUP BY 1 ORDER BY count(*) DESC LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {organization_id} = %(org)s "
+               "AND {appointment_date} BETWEEN '2024-03-01' AND '2024-03-31' ORDER BY {appointment_date}",
+    },
+    {
+        'name': 'appointments by org, status and date',
+        'table': 'appointments',
+        'params': 'SELECT {organization_id} AS org FROM {table} GROUP BY 1 ORDER BY count(*) DESC LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {organization_id} = %(org)s AND {status} = 'pending' "
+               "AND {appointment_date} >= '2025-01-01' ORDER BY {appointment_date} LIMIT 50",
+    },
+    {
+        'name': 'appointments by customer',
+        'table': 'appointments',
+        'params': 'SELECT {customer_id} AS customer FROM {table} ORDER BY {id} LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {customer_id} = %(customer)s ORDER BY {appointment_date} DESC",
+    },
+    {
+        'name': 'customers by org and phone',
+        'table': 'customers',
+        'params': 'SELECT {organization_id} AS org, {phone} AS phone FROM {table} ORDER BY {id} DESC LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {organization_id} = %(org)s AND {phone} = %(phone)s",
+    },
+    {
+        'name': 'customers by org, newest first',
+        'table': 'customers',
+        'params': 'SELECT {organization_id} AS org FROM {table} GROUP BY 1 ORDER BY count(*) DESC LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {organization_id} = %(org)s ORDER BY {created_at} DESC LIMIT 20",
+    },
+    {
+        'name': 'inventory transactions by product',
+        'table': 'inventory_transactions',
+        'params': 'SELECT {product_id} AS product FROM {table} ORDER BY {id} LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {product_id} = %(product)s ORDER BY {transaction_date} DESC LIMIT 100",
+    },
+    {
+        'name': 'inventory transactions by org and date',
+        'table': 'inventory_transactions',
+        'params': 'SELECT {organization_id} AS org FROM {table} GROUP BY 1 ORDER BY count(*) DESC LIMIT 1',
+        'sql': "SELECT * FROM {table} WHERE {organization_id} = %(org)s "
+               "AND {transaction_date} >= '2025-06-01' ORDER BY {transaction_date} DESC LIMIT 100",
+    },
+]
+
+# Candidates the naming heuristics cannot infer: (table, columns, reason)
+EXTRA_CANDIDATES = [
+    ('customers', ['organization_id', 'phone'], 'lookup by phone within a tenant'),
+]
+
+def resolve_names(path):
+    """{snake table: (table, {snake column: column})} for a SQL schema dump."""
+    catalog = {}
+    for table, columns in parse_sql(path, lambda n: n).items():
+        catalog[camel_to_snake(table)] = (table, {camel_to_snake(c): c for c in columns})
+    return catalog
+
+def render_query(template, table, names):
+    columns = {snake: f'"{name}"' for snake, name in names[table][1].items()}
+    return template.format(table=f'"{names[table][0]}"', **columns)
+
+def create_database(admin_dsn, name):
+    conn = connect(admin_dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE);')
+            cur.execute(f'CREATE DATABASE "{name}";')
+    finally:
+        conn.close()
+
+def drop_database(admin_dsn, name):
+    conn = connect(admin_dsn)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE);')
+    finally:
+        conn.close()
+
+def load_schema(conn, path):
+    """Run each statement of a schema dump on its own; returns (applied, failed)."""
+    with open(path, 'r') as f:
+        statements = split_statements(f.read())
+    applied = failed = 0
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for statement in statements:
+            try:
+                cur.execute(statement)
+                applied += 1
+            except Exception:
+                failed += 1
+    conn.autocommit = False
+    return applied, failed
+
+def load_table(conn, generator, table, total, names, chunk_size=CHUNK_SIZE):
+    """COPY generated rows into the dump's version of table; returns the skipped columns."""
+    target, columns = names[table]
+    skipped = []
+    with conn.cursor() as cur:
+        for start in range(1, total + 1, chunk_size):
+            ids = np.arange(start, min(start + chunk_size, total + 1), dtype=np.int64)
+            data = getattr(generator, table)(ids)
+            keep = [c for c in data if c in columns]
+            skipped = [c for c in data if c not in columns]
+            buf = io.StringIO()
+            buf.write('\n'.join(map(','.join, zip(*(data[c].tolist() for c in keep)))))
+            buf.write('\n')
+            buf.seek(0)
+            cols = ', '.join(f'"{columns[c]}"' for c in keep)
+            cur.copy_expert(f'COPY "{target}" ({cols}) FROM STDIN WITH (FORMAT csv)', buf)
+        cur.execute(f'ANALYZE "{target}";')
+    conn.commit()
+    return skipped
+
+def candidates_from(args, tables, names):
+    """Advisor proposals plus EXTRA_CANDIDATES on the benchmarked tables, with dump names."""
+    if args.candidates:
+        with open(args.candidates, 'r') as f:
+            proposals = json.load(f)
+    else:
+        files = sorted(glob.glob("drizzle/*.ts")) if args.all else args.schema
+        proposals = advise(parse_tables(files))
+    for table, columns, reason in EXTRA_CANDIDATES:
+        proposals.append({'table': table, 'columns': columns, 'reason': reason,
+                          'name': index_name(table, columns)})
+    seen = set()
+    kept = []
+    for p in proposals:
+        table = camel_to_snake(p['table'])
+        if table not in tables:
+            continue
+        columns = [names[table][1].get(camel_to_snake(c)) for c in p['columns']]
+        key = (table, tuple(columns))
+        if None in columns or key in seen:
+            continue
+        seen.add(key)
+        kept.append(dict(p, table=table, sql_table=names[table][0], sql_columns=columns))
+    return kept
+
+def plan_indexes(plan):
+    """Index names referenced anywhere in an EXPLAIN (FORMAT JSON) plan tree."""
+    found = set()
+    if 'Index Name' in plan:
+        found.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        found |= plan_indexes(child)
+    return found
+
+def explain(cur, sql, params, repeat):
+    """Median execution ms, shared buffers touched and indexes used over `repeat` runs."""
+    timings = []
+    for _ in range(repeat + 1):          # the first run only warms the cache
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        result = cur.fetchone()[0][0]
+        timings.append(result['Execution Time'])
+    plan = result['Plan']
+    return {
+        'ms': round(statistics.median(timings[1:]), 3),
+        'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+        'indexes': sorted(plan_indexes(plan)),
+    }
+
+def run_queries(conn, queries, repeat):
+    with conn.cursor() as cur:
+        return {q['name']: explain(cur, q['sql'], q['params'], repeat) for q in queries}
+
+def bench_candidate(conn, candidate, queries, baseline, repeat):
+    name = candidate['name']
+    cols = ', '.join(f'"{c}"' for c in candidate['sql_columns'])
+    with conn.cursor() as cur:
+        t0 = time.perf_counter()
+        cur.execute(f'CREATE INDEX "{name}" ON "{candidate["sql_table"]}" ({cols});')
+        build_ms = (time.perf_counter() - t0) * 1000
+        cur.execute(f'ANALYZE "{candidate["sql_table"]}";')
+        cur.execute("SELECT pg_relation_size(%s::regclass)", (f'"{name}"',))
+        size = cur.fetchone()[0]
+    conn.commit()
+    try:
+        after = run_queries(conn, queries, repeat)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f'DROP INDEX "{name}";')
+        conn.commit()
+    per_query = {}
+    saved = 0.0
+    for q in queries:
+        before, with_index = baseline[q['name']], after[q['name']]
+        used = name in with_index['indexes']
+        if used:
+            saved += before['ms'] - with_index['ms']
+        per_query[q['name']] = {'before_ms': before['ms'], 'after_ms': with_index['ms'], 'used': used,
+                                'buffers_before': before['buffers'], 'buffers_after': with_index['buffers']}
+    mb = size / (1024 * 1024)
+    return dict(candidate, size_bytes=size, build_ms=round(build_ms, 1), saved_ms=round(saved, 3),
+                saved_ms_per_mb=round(saved / mb, 3) if mb else 0.0, queries=per_query)
+
+def print_ranking(results, baseline):
+    print(f"\n{'query':<42} {'baseline ms':>12} {'buffers':>9}")
+    for name, b in baseline.items():
+        print(f"{name:<42} {b['ms']:>12.3f} {b['buffers']:>9}")
+    print(f"\n{'rank':>4}  {'index':<58} {'MB':>8} {'saved ms':>10} {'ms/MB':>10}  used by")
+    for rank, r in enumerate(results, 1):
+        used = ', '.join(q for q, m in r['queries'].items() if m['used']) or '-'
+        print(f"{rank:>4}  {r['name'][:58]:<58} {r['size_bytes'] / 1048576:>8.2f} "
+              f"{r['saved_ms']:>10.3f} {r['saved_ms_per_mb']:>10.3f}  {used}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sql', default=SCHEMA_SQL, help='schema dump to load into the throwaway database')
+    parser.add_argument('--scale', type=float, default=0.02, help="gen_load_data.py's row multiplier (1.0 ~ 10M rows)")
+    parser.add_argument('--rows', action='append', default=[], help='override one table, e.g. appointments=500000')
+    parser.add_argument('--repeat', type=int, default=5, help='EXPLAIN ANALYZE runs per query (median is used)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the generated data')
+    parser.add_argument('--candidates', help="index_advisor.py --json output (default: run the advisor here)")
+    parser.add_argument('--schema', nargs='+', default=['drizzle/schema.ts'], help='Drizzle modules for the advisor')
+    parser.add_argument('--all', action='store_true', help='run the advisor on every drizzle/*.ts file')
+    parser.add_argument('--admin-db', default='postgres', help='database to connect to for CREATE/DROP DATABASE')
+    parser.add_argument('--db', default=f"{BENCH_DB}_{os.getpid()}", help='name of the throwaway database')
+    parser.add_argument('--keep', action='store_true', help='keep the throwaway database afterwards')
+    parser.add_argument('--report', help='write the ranking and per-query timings as JSON')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    dsn = get_dsn()
+    if parse_dsn(dsn).get('dbname') == args.db:
+        sys.exit(f"refusing to benchmark in {args.db}: it is the DATABASE_URL database")
+    names = resolve_names(args.sql)
+    tables = sorted({q['table'] for q in QUERIES})
+    missing = [t for t in tables if t not in names]
+    if missing:
+        sys.exit(f"{args.sql} has no table for: {', '.join(missing)}")
+
+    admin_dsn = make_dsn(dsn, dbname=args.admin_db)
+    create_database(admin_dsn, args.db)
+    conn = connect(make_dsn(dsn, dbname=args.db), statement_timeout_ms=0)
+    try:
+        t0 = time.perf_counter()
+        applied, failed = load_schema(conn, args.sql)
+        print(f"Schema: {applied} statements applied, {failed} skipped ({time.perf_counter() - t0:.1f}s)")
+
+        rows = parse_rows(args.rows, args.scale)
+        generator = Generator(rows, args.seed)
+        for table in tables:
+            t1 = time.perf_counter()
+            skipped = load_table(conn, generator, table, rows[table], names)
+            note = f" (not in dump: {', '.join(skipped)})" if skipped else ""
+            print(f"  {table:<24} {rows[table]:>10,} rows {time.perf_counter() - t1:>7.1f}s{note}")
+
+        queries = []
+        with conn.cursor() as cur:
+            for q in QUERIES:
+                cur.execute(render_query(q['params'], q['table'], names))
+                values = cur.fetchone()
+                params = dict(zip([d[0] for d in cur.description], values))
+                queries.append(dict(q, sql=render_query(q['sql'], q['table'], names), params=params))
+        conn.commit()
+
+        candidates = candidates_from(args, tables, names)
+        print(f"Benchmarking {len(candidates)} candidate indexes on {len(queries)} queries...")
+        baseline = run_queries(conn, queries, args.repeat)
+        results = []
+        for c in candidates:
+            by_table = [q for q in queries if q['table'] == c['table']]
+            results.append(bench_candidate(conn, c, by_table, baseline, args.repeat))
+        results.sort(key=lambda r: r['saved_ms_per_mb'], reverse=True)
+        print_ranking(results, baseline)
+        if args.report:
+            report = {'database': args.db, 'rows': {t: rows[t] for t in tables}, 'repeat': args.repeat,
+                      'baseline': baseline, 'queries': [{k: q[k] for k in ('name', 'table', 'sql', 'params')}
+                                                        for q in queries],
+                      'candidates': results}
+            write_file(args.report, json.dumps(report, indent=2, ensure_ascii=False, default=str) + '\n')
+    finally:
+        conn.close()
+        if args.keep:
+            print(f"Kept database {args.db}")
+        else:
+            drop_database(admin_dsn, args.db)
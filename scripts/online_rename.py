@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Apply the snake_case renames to a live database without stalling the app.
+
+RENAME COLUMN is a catalog-only change, but it needs an ACCESS EXCLUSIVE
+lock on the table. A plain ALTER waits behind any long-running query on
+that table, and every query arriving after it queues behind the ALTER, so
+one slow report can freeze the clinic app. This executor:
+
+  - groups the renames per table and applies at most --batch-size of them
+    in one short transaction, so each lock is held for milliseconds;
+    enum type renames go first, in batches of their own per schema
+  - sets lock_timeout for that transaction; if the lock is not granted in
+    time the batch is rolled back (releasing the queue behind it), the
+    sessions holding locks on the table are logged, and the batch is
+    retried after a jittered exponential backoff
+  - skips renames that are already applied, so an interrupted run can be
+    resumed by running it again; a table, column or enum found under
+    neither its old nor its new name fails its batch
+  - with --compat-schema, creates in the same transaction a view per
+    renamed table in that schema that exposes the old table and column
+    names; application instances still on the old names keep working
+    with search_path=<compat schema>,public until they are redeployed
+    (simple views are updatable, so writes go through as well)
+  - logs every statement with its lock wait and outcome (--log writes JSON)
+  - refuses a migration with statements it cannot apply, rather than
+    applying the rest and reporting success
+
+The renames come from a migration written by rename_migration.py or from
+fix_schema.py's --name-map table resolved against the live catalog:
+
+  python scripts/online_rename.py --migration drizzle/0001_snake_case_renames.sql --compat-schema legacy
+  python scripts/online_rename.py --name-map renames.json --dry-run
+  python scripts/online_rename.py --drop-compat legacy     # after the rollout
+
+--simulate-load N runs N client threads (reads, writes and one session
+holding long transactions) against the renamed tables through the old
+names while the renames are applied, and reports their latency and
+errors, for rehearsing against a local Postgres.
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+
+import psycopg2
+
+from atomic_write import write_file
+from db_conn import connect, get_dsn
+
+LOCK_TIMEOUT_MS = 2_000
+BATCH_SIZE = 10
+RETRIES = 8
+BACKOFF = 0.5                   # first retry delay in seconds, doubled each attempt
+MAX_BACKOFF = 15.0
+HOLD_SECONDS = 5.0              # length of the simulator's long transactions
+
+RENAME_COLUMN_RE = re.compile(r'ALTER TABLE (?:"(\w+)"\.)?"(\w+)" RENAME COLUMN "(\w+)" TO "(\w+)"')
+RENAME_TABLE_RE = re.compile(r'ALTER TABLE (?:"(\w+)"\.)?"(\w+)" RENAME TO "(\w+)"')
+RENAME_TYPE_RE = re.compile(r'ALTER TYPE (?:"(\w+)"\.)?"(\w+)" RENAME TO "(\w+)"')
+BREAKPOINT_RE = re.compile(r'-->\s*statement-breakpoint')
+
+BLOCKERS_SQL = """
+SELECT a.pid, l.mode, a.state, round(extract(epoch FROM now() - a.xact_start) * 1000) AS xact_ms,
+       left(a.query, 120) AS query
+FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid
+WHERE l.relation = to_regclass(%s) AND l.granted AND a.pid <> pg_backend_pid()
+ORDER BY a.xact_start
+"""
+
+COLUMNS_SQL = """
+SELECT column_name FROM information_schema.columns
+WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position
+"""
+
+ENUMS_SQL = """
+SELECT t.typname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace
+WHERE n.nspname = %s AND t.typtype = 'e'
+"""
+
+class Rename:
+    """One column, table or enum type rename; table is the table's name before any rename.
+
+    kind is 'column', 'table' or 'type'; type renames have no table.
+    """
+
+    def __init__(self, schema, table, old, new, kind='column'):
+        self.schema = schema or 'public'
+        self.table = table
+        self.old = old
+        self.new = new
+        self.kind = kind
+
+    @property
+    def column(self):
+        return self.kind == 'column'
+
+    def sql(self, table=None):
+        if self.kind == 'type':
+            return f'ALTER TYPE "{self.schema}"."{self.old}" RENAME TO "{self.new}";'
+        target = f'"{self.schema}"."{table or self.table}"'
+        if self.column:
+            return f'ALTER TABLE {target} RENAME COLUMN "{self.old}" TO "{self.new}";'
+        return f'ALTER TABLE {target} RENAME TO "{self.new}";'
+
+def parse_migration(path):
+    """(renames, unsupported statements) from a rename_migration.py (drizzle-kit style) migration file.
+
+    Column renames there name the table after its own rename; they are
+    mapped back to the original table name here.
+    """
+    with open(path, 'r') as f:
+        statements = [s.strip() for s in BREAKPOINT_RE.split(f.read()) if s.strip()]
+    renames, unsupported = [], []
+    for statement in statements:
+        m = RENAME_TYPE_RE.match(statement)
+        if m:
+            renames.append(Rename(m.group(1), None, m.group(2), m.group(3), kind='type'))
+            continue
+        m = RENAME_TABLE_RE.match(statement)
+        if m:
+            renames.append(Rename(m.group(1), m.group(2), m.group(2), m.group(3), kind='table'))
+            continue
+        m = RENAME_COLUMN_RE.match(statement)
+        if m:
+            renames.append(Rename(*m.groups()))
+            continue
+        unsupported.append(statement)
+    old_table = {(r.schema, r.new): r.table for r in renames if r.kind == 'table'}
+    for r in renames:
+        if r.column:
+            r.table = old_table.get((r.schema, r.table), r.table)
+    return renames, unsupported
+
+def renames_from_catalog(conn, name_map, schema='public'):
+    """Renames from a {old: new} table for the enum types, tables and columns that exist in schema."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT table_name, column_name FROM information_schema.columns "
+                    "WHERE table_schema = %s ORDER BY table_name, ordinal_position", (schema,))
+        catalog = {}
+        for table, column in cur.fetchall():
+            catalog.setdefault(table, []).append(column)
+        cur.execute(ENUMS_SQL, (schema,))
+        enums = {t for t, in cur.fetchall()}
+    conn.rollback()
+    renames = []
+    for enum in sorted(enums):
+        new = name_map.get(enum)
+        if new and new != enum and new not in enums:
+            renames.append(Rename(schema, None, enum, new, kind='type'))
+    for table, columns in catalog.items():
+        new_table = name_map.get(table)
+        if new_table and new_table != table and new_table not in catalog:
+            renames.append(Rename(schema, table, table, new_table, kind='table'))
+        for column in columns:
+            new = name_map.get(column)
+            if new and new != column and new not in columns:
+                renames.append(Rename(schema, table, column, new))
+    return renames
+
+def group_by_table(renames, batch_size):
+    """[(schema, table, table_renames, batch)] with table renames first within each table.
+
+    table_renames is every rename of the table, so each batch can tell the
+    table's current name and the compatibility view covers all its columns.
+    Enum type renames come first, batched per schema with table None, so
+    columns of a renamed type keep resolving (the order rename_migration.py
+    writes).
+    """
+    types, tables = {}, {}
+    for r in renames:
+        if r.kind == 'type':
+            types.setdefault(r.schema, []).append(r)
+        else:
+            tables.setdefault((r.schema, r.table), []).append(r)
+    batches = []
+    for schema, items in types.items():
+        for i in range(0, len(items), batch_size):
+            batches.append((schema, None, items, items[i:i + batch_size]))
+    for (schema, table), items in tables.items():
+        items.sort(key=lambda r: r.kind != 'table')
+        for i in range(0, len(items), batch_size):
+            batches.append((schema, table, items, items[i:i + batch_size]))
+    return batches
+
+def current_state(cur, schema, table, table_renames, batch):
+    """(live table name, renames of batch still to apply, renames whose target is missing).
+
+    Already-applied renames are dropped; live is None when the table
+    exists under neither its old nor its new name.
+    """
+    new_table = next((r.new for r in table_renames if r.kind == 'table'), None)
+    cur.execute("SELECT to_regclass(%s), to_regclass(%s)",
+                (f'"{schema}"."{table}"', f'"{schema}"."{new_table}"' if new_table else None))
+    old_exists, new_exists = cur.fetchone()
+    if not old_exists and not new_exists:
+        return None, [], list(batch)
+    live = table if old_exists else new_table
+    cur.execute(COLUMNS_SQL, (schema, live))
+    columns = {c for c, in cur.fetchall()}
+    pending, missing = [], []
+    for r in batch:
+        if r.kind == 'table':
+            if live == table:
+                pending.append(r)
+        elif r.old in columns and r.new not in columns:
+            pending.append(r)
+        elif r.new not in columns:
+            missing.append(r)
+    return live, pending, missing
+
+def pending_types(cur, schema, batch):
+    """(type renames of batch still to apply, those whose enum exists under neither name)."""
+    cur.execute(ENUMS_SQL, (schema,))
+    enums = {t for t, in cur.fetchall()}
+    pending = [r for r in batch if r.old in enums and r.new not in enums]
+    return pending, [r for r in batch if r.old not in enums and r.new not in enums]
+
+def compat_view_sql(cur, compat_schema, schema, table, renamed_table, renames):
+    """CREATE VIEW exposing the pre-rename names of table (now renamed_table)."""
+    old_names = {r.new: r.old for r in renames if r.column}
+    cur.execute(COLUMNS_SQL, (schema, renamed_table))
+    select = ', '.join(f'"{c}" AS "{old_names[c]}"' if c in old_names else f'"{c}"'
+                       for c, in cur.fetchall())
+    return (f'CREATE OR REPLACE VIEW "{compat_schema}"."{table}" AS '
+            f'SELECT {select} FROM "{schema}"."{renamed_table}";')
+
+class Executor:
+    """Applies rename batches with lock_timeout, backoff retries and a per-statement log."""
+
+    def __init__(self, conn, lock_timeout_ms=LOCK_TIMEOUT_MS, retries=RETRIES, backoff=BACKOFF,
+                 max_backoff=MAX_BACKOFF, compat_schema=None, dry_run=False):
+        self.conn = conn
+        self.lock_timeout_ms = lock_timeout_ms
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.compat_schema = compat_schema
+        self.dry_run = dry_run
+        self.log = []
+
+    def _record(self, table, statement, attempt, started, ok, error=None, blockers=None):
+        entry = {
+            'table': table,
+            'statement': statement,
+            'attempt': attempt,
+            'lock_wait_ms': round((time.perf_counter() - started) * 1000, 1),
+            'ok': ok,
+            'error': error,
+            'blockers': blockers or [],
+        }
+        self.log.append(entry)
+        status = 'ok' if ok else f"FAILED ({error})"
+        print(f"  [{attempt}] {entry['lock_wait_ms']:>8.1f} ms  {status:<12}  {statement}")
+        return entry
+
+    def _blockers(self, schema, table):
+        with self.conn.cursor() as cur:
+            cur.execute(BLOCKERS_SQL, (f'"{schema}"."{table}"',))
+            names = [d[0] for d in cur.description]
+            rows = [dict(zip(names, row)) for row in cur.fetchall()]
+        self.conn.rollback()
+        return rows
+
+    def apply_batch(self, schema, table, table_renames, batch):
+        """Apply one batch in one transaction, retrying on lock timeouts; returns True on success.
+
+        A batch with table None holds enum type renames.
+        """
+        label = table or 'types'
+        delay = self.backoff
+        for attempt in range(1, self.retries + 2):
+            with self.conn.cursor() as cur:
+                if table is None:
+                    live = None
+                    pending, missing = pending_types(cur, schema, batch)
+                else:
+                    live, pending, missing = current_state(cur, schema, table, table_renames, batch)
+                if missing:
+                    self.conn.rollback()
+                    if table is None:
+                        what = f"enums not found: {', '.join(r.old for r in missing)}"
+                    elif live is None:
+                        what = f"table {schema}.{table} not found"
+                    else:
+                        what = f"columns not found in {schema}.{live}: {', '.join(r.old for r in missing)}"
+                    self._record(label, '', attempt, time.perf_counter(), False, what)
+                    return False
+                if not pending:
+                    self.conn.rollback()
+                    print(f"  {schema}.{label}: already applied")
+                    return True
+                statements = []
+                renamed_table = live
+                for r in pending:
+                    statements.append(r.sql(renamed_table))
+                    if r.kind == 'table':
+                        renamed_table = r.new
+                if self.dry_run:
+                    self.conn.rollback()
+                    for statement in statements:
+                        print(f"  {statement}")
+                    return True
+                statement = None
+                started = time.perf_counter()
+                try:
+                    cur.execute(f"SET LOCAL lock_timeout = '{int(self.lock_timeout_ms)}ms'")
+                    for statement in statements:
+                        started = time.perf_counter()
+                        cur.execute(statement)
+                        self._record(label, statement, attempt, started, True)
+                    if self.compat_schema and table is not None:
+                        statement = compat_view_sql(cur, self.compat_schema, schema, table, renamed_table,
+                                                    table_renames)
+                        started = time.perf_counter()
+                        cur.execute(f'CREATE SCHEMA IF NOT EXISTS "{self.compat_schema}";')
+                        cur.execute(statement)
+                        self._record(label, statement, attempt, started, True)
+                    self.conn.commit()
+                    return True
+                except psycopg2.errors.LockNotAvailable:
+                    self.conn.rollback()
+                    blockers = self._blockers(schema, live) if live else []
+                    self._record(label, statement, attempt, started, False, 'lock_timeout', blockers)
+                    for b in blockers:
+                        print(f"      held by pid {b['pid']} ({b['mode']}, {b['state']}, "
+                              f"{b['xact_ms']} ms in transaction): {b['query']}")
+                except psycopg2.Error as e:
+                    self.conn.rollback()
+                    self._record(label, statement, attempt, started, False, str(e).strip().splitlines()[0])
+                    return False
+            if attempt > self.retries:
+                break
+            sleep = min(delay, self.max_backoff) * (1 + random.random() / 2)
+            print(f"  retry {attempt}/{self.retries} for {schema}.{label} in {sleep:.1f}s")
+            time.sleep(sleep)
+            delay *= 2
+        return False
+
+    def run(self, batches):
+        """Apply every batch in order; returns the batches that failed."""
+        failed = []
+        for schema, table, table_renames, batch in batches:
+            print(f"{schema}.{table or 'types'}: {len(batch)} renames")
+            if not self.apply_batch(schema, table, table_renames, batch):
+                failed.append((schema, table, batch))
+        return failed
+
+def drop_compat(conn, compat_schema):
+    with conn.cursor() as cur:
+        cur.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT_MS}ms'")
+        cur.execute(f'DROP SCHEMA IF EXISTS "{compat_schema}" CASCADE;')
+    conn.commit()
+
+class LoadSimulator:
+    """Client threads querying the renamed tables by their old names while the renames run."""
+
+    def __init__(self, dsn, renames, clients, search_path='public', hold_seconds=HOLD_SECONDS):
+        self.dsn = dsn
+        self.search_path = search_path
+        self.hold_seconds = hold_seconds
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.queries = self._queries(renames)
+        self.threads = [threading.Thread(target=self._client, args=(i,), daemon=True) for i in range(clients)]
+        if self.queries:
+            self.threads.append(threading.Thread(target=self._holder, daemon=True))
+
+    @staticmethod
+    def _queries(renames):
+        by_table = {}
+        for r in renames:
+            if r.column:
+                by_table.setdefault((r.schema, r.table), r.old)
+        queries = []
+        for (schema, table), column in by_table.items():
+            queries.append(('read', f'SELECT "{column}" FROM "{table}" LIMIT 10'))
+            queries.append(('write', f'UPDATE "{table}" SET "{column}" = "{column}" '
+                                     f'WHERE "id" = (SELECT min("id") FROM "{table}")'))
+        return queries
+
+    def _connect(self):
+        conn = connect(self.dsn, options=f'-c search_path={self.search_path}')
+        conn.autocommit = True
+        return conn
+
+    def _note(self, kind, started, error=None):
+        with self.lock:
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            else:
+                self.latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+
+    def _client(self, seed):
+        rng = random.Random(seed)
+        conn = self._connect()
+        with conn.cursor() as cur:
+            while not self.stop.is_set() and self.queries:
+                kind, sql = rng.choice(self.queries)
+                started = time.perf_counter()
+                try:
+                    cur.execute(sql)
+                    self._note(kind, started)
+                except psycopg2.Error as e:
+                    self._note(kind, started, str(e).strip().splitlines()[0][:80])
+                time.sleep(rng.uniform(0.005, 0.02))
+        conn.close()
+
+    def _holder(self):
+        """A reporting-style session keeping a long transaction open on each table in turn."""
+        conn = self._connect()
+        conn.autocommit = False
+        reads = [sql for kind, sql in self.queries if kind == 'read']
+        i = 0
+        while not self.stop.is_set():
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(reads[i % len(reads)])
+                    cur.execute("SELECT pg_sleep(%s)", (self.hold_seconds,))
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                self._note('hold', time.perf_counter(), str(e).strip().splitlines()[0][:80])
+            i += 1
+            self.stop.wait(0.5)
+        conn.close()
+
+    def start(self):
+        for t in self.threads:
+            t.start()
+
+    def finish(self):
+        self.stop.set()
+        for t in self.threads:
+            t.join(self.hold_seconds + 5)
+        summary = {}
+        for kind, values in self.latencies.items():
+            values = sorted(values)
+            summary[kind] = {
+                'count': len(values),
+                'p50_ms': round(statistics.median(values), 1),
+                'p99_ms': round(values[min(len(values) - 1, int(len(values) * 0.99))], 1),
+                'max_ms': round(values[-1], 1),
+            }
+        return {'latency': summary, 'errors': self.errors}
+
+def print_load(result):
+    print("\nSimulated load during the renames:")
+    for kind, s in result['latency'].items():
+        print(f"  {kind:<6} {s['count']:>7} queries  p50 {s['p50_ms']:>7.1f} ms  p99 {s['p99_ms']:>8.1f} ms  "
+              f"max {s['max_ms']:>8.1f} ms")
+    for error, count in sorted(result['errors'].items(), key=lambda e: -e[1]):
+        print(f"  {count:>6} x {error}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--migration', help='migration file written by rename_migration.py')
+    source.add_argument('--name-map', help='rename table written by fix_schema.py --name-map')
+    source.add_argument('--drop-compat', metavar='SCHEMA', help='drop a compatibility view schema and exit')
+    parser.add_argument('--schema', default='public', help='schema the --name-map renames apply to')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='renames per transaction (per table)')
+    parser.add_argument('--lock-timeout', type=int, default=LOCK_TIMEOUT_MS, help='lock_timeout per batch, in ms')
+    parser.add_argument('--retries', type=int, default=RETRIES, help='retries per batch after a lock timeout')
+    parser.add_argument('--compat-schema', help='create views with the old names in this schema')
+    parser.add_argument('--dry-run', action='store_true', help='print the pending statements without running them')
+    parser.add_argument('--log', help='write the per-statement log (lock waits, blockers) as JSON')
+    parser.add_argument('--simulate-load', type=int, default=0, metavar='N',
+                        help='run N client threads against the renamed tables while applying')
+    parser.add_argument('--hold-seconds', type=float, default=HOLD_SECONDS,
+                        help="length of the simulator's long-running transactions")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    dsn = get_dsn()
+    conn = connect(dsn)
+    if args.drop_compat:
+        drop_compat(conn, args.drop_compat)
+        print(f"Dropped compatibility schema {args.drop_compat}")
+        raise SystemExit(0)
+    if args.migration:
+        renames, unsupported = parse_migration(args.migration)
+        if unsupported:
+            for statement in unsupported:
+                print(f"  Unsupported statement: {statement[:80]}")
+            raise SystemExit(f"{args.migration}: {len(unsupported)} statements this script cannot apply; "
+                             "nothing was run")
+    else:
+        with open(args.name_map, 'r') as f:
+            renames = renames_from_catalog(conn, json.load(f), args.schema)
+    batches = group_by_table(renames, args.batch_size)
+    print(f"{len(renames)} renames in {len(batches)} batches (lock_timeout {args.lock_timeout} ms)")
+
+    simulator = None
+    if args.simulate_load and not args.dry_run:
+        search_path = f"{args.compat_schema},public" if args.compat_schema else 'public'
+        simulator = LoadSimulator(dsn, renames, args.simulate_load, search_path, args.hold_seconds)
+        simulator.start()
+        time.sleep(1.0)
+    executor = Executor(conn, args.lock_timeout, args.retries, compat_schema=args.compat_schema,
+                        dry_run=args.dry_run)
+    t0 = time.perf_counter()
+    try:
+        failed = executor.run(batches)
+    finally:
+        load = simulator.finish() if simulator else None
+        conn.close()
+    elapsed = time.perf_counter() - t0
+    waits = [e['lock_wait_ms'] for e in executor.log if e['ok']]
+    timeouts = sum(1 for e in executor.log if e['error'] == 'lock_timeout')
+    if load:
+        print_load(load)
+    print(f"\n{len(batches) - len(failed)}/{len(batches)} batches applied in {elapsed:.1f}s, "
+          f"{timeouts} lock timeouts, max lock wait {max(waits, default=0):.1f} ms")
+    for schema, table, items in failed:
+        print(f"  FAILED: {schema}.{table or 'types'} ({len(items)} renames)")
+    if args.log:
+        write_file(args.log, json.dumps({'seconds': elapsed, 'statements': executor.log, 'load': load},
+                                        indent=2, ensure_ascii=False, default=str) + '\n')
+    raise SystemExit(1 if failed else 0)
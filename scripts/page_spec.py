@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Declarative page transforms: tRPC hooks, loading/error guards and
+replacements described per page in scripts/page_specs/<Page>.json.
+
+A spec looks like:
+
+  {
+    "path": "client/src/pages/WebhookPage.tsx",
+    "hooks": [
+      {"code": ["const organizationId = 1; // TODO: from context"]},
+      {"query": {"procedure": "lineWebhook.listEvents",
+                 "bind": {"data": "eventsData", "isLoading": "isLoading", "error": "error", "refetch": "refetch"},
+                 "input": "{ organizationId, page: 1, limit: 50 }",
+                 "options": "{ enabled: !!organizationId }"}},
+      {"mutation": {"name": "createMutation", "procedure": "x.create",
+                    "success": "已建立", "refetch": ["refetch"]}},
+      {"code": ["const webhookEvents = (eventsData as any)?.data ?? eventsData ?? [];"]}
+    ],
+    "replace": [{"literal": "old", "with": "new"}, {"regex": "a\\s+b", "with": "c"}],
+    "guard": {"loading": "isLoading", "variant": "skeleton-table", "error": "error", "refetch": "refetch"},
+    "toast_import": true
+  }
+
+Optional keys: "component" (regexes locating the component whose body
+receives the hooks; the first "{" at or after the match opens it) and
+"remove_section" (text markers; the first one found starts a block that is
+removed up to the component).
+
+compile_spec() compiles every regex once. Applying a compiled spec finds
+all anchors and replacement matches in one scan of the original text and
+assembles the result in one splice, so cost is linear in the page size.
+"""
+import glob
+import json
+import os
+import re
+
+from codemod import splice
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_specs")
+
+TRPC_IMPORT = 'import { trpc } from "@/lib/trpc";'
+QUERY_STATE_IMPORT = 'import { QueryLoading, QueryError } from "@/components/ui/query-state";'
+TOAST_IMPORT = 'import { toast } from "sonner";'
+
+DEFAULT_COMPONENT = [r'export default function \w+\(\)\s*\{', r'const \w+ = \(\) => \{']
+RETURN_RE = re.compile(r'(\s+)return \(')
+IMPORT_LINE_RE = re.compile(r'^[ \t]*(?:import |\} from)', re.M)
+
+def _indent(lines):
+    return '\n'.join('  ' + line if line else '  ' for line in lines)
+
+def render_query(q):
+    bind = ', '.join(key if name == key else f'{key}: {name}' for key, name in q['bind'].items())
+    args = [a for a in (q.get('input'), q.get('options')) if a]
+    call = '(\n' + ',\n'.join('    ' + a for a in args) + '\n  )' if args else '()'
+    return f"  const {{ {bind} }} = trpc.{q['procedure']}.useQuery{call};"
+
+def render_mutation(m):
+    refetch = m.get('refetch') or []
+    toast = f'toast.success("{m["success"]}")'
+    on_success = '{ ' + '; '.join([toast] + [f'{r}()' for r in refetch]) + '; }' if refetch else toast
+    return (f"  const {m['name']} = trpc.{m['procedure']}.useMutation({{\n"
+            f"    onSuccess: () => {on_success},\n"
+            f"    onError: (err: any) => toast.error(err.message),\n"
+            f"  }});")
+
+def render_hooks(hooks):
+    """The hook block inserted after the component's opening brace."""
+    blocks = []
+    for hook in hooks:
+        if 'query' in hook:
+            blocks.append(render_query(hook['query']))
+        elif 'mutation' in hook:
+            blocks.append(render_mutation(hook['mutation']))
+        else:
+            blocks.append(_indent(hook['code']))
+    return '\n' + '\n  \n'.join(blocks) + '\n'
+
+def render_guard(guard, indent):
+    return (f'{indent}if ({guard["loading"]}) return <QueryLoading variant="{guard["variant"]}" />;'
+            f'{indent}if ({guard["error"]}) return <QueryError message={{{guard["error"]}.message}} '
+            f'onRetry={{{guard["refetch"]}}} />;\n')
+
+class PageSpec:
+    """A spec with its hook code rendered and its regexes compiled; call it with a SourceFile."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.path = spec['path']
+        self.component_res = [re.compile(p) for p in spec.get('component', DEFAULT_COMPONENT)]
+        self.remove_markers = spec.get('remove_section', [])
+        self.hook_code = render_hooks(spec['hooks']) if spec.get('hooks') else None
+        self.guard = spec.get('guard')
+        self.toast_import = spec.get('toast_import', False)
+        self.replacements = []
+        parts = []
+        for i, rule in enumerate(spec.get('replace', [])):
+            pattern = rule['regex'] if 'regex' in rule else re.escape(rule['literal'])
+            parts.append(f'(?P<r{i}>{pattern})')
+            self.replacements.append(rule)
+        # One alternation for every replacement, dispatched on lastgroup.
+        self.replace_re = re.compile('|'.join(parts)) if parts else None
+
+    def __call__(self, src):
+        src.text = self.apply(src.text)
+
+    def missing_imports(self, content):
+        wanted = []
+        if 'from "@/lib/trpc"' not in content:
+            wanted += [TRPC_IMPORT, QUERY_STATE_IMPORT]
+        if self.toast_import and 'from "sonner"' not in content:
+            wanted += [TRPC_IMPORT, QUERY_STATE_IMPORT, TOAST_IMPORT]
+        seen = []
+        for imp in wanted:
+            if imp not in content and imp not in seen:
+                seen.append(imp)
+        return seen
+
+    def find_component(self, content):
+        for component_re in self.component_res:
+            m = component_re.search(content)
+            if m:
+                return m
+        return None
+
+    def apply(self, content):
+        edits = []          # (start, end, text) against the original content
+        removed = None
+
+        imports = self.missing_imports(content)
+        if imports:
+            last = None
+            for last in IMPORT_LINE_RE.finditer(content):
+                pass
+            if last is None:
+                pos = content.find('\n')
+            else:
+                pos = content.find('\n', last.start())
+            pos = len(content) if pos == -1 else pos
+            edits.append((pos, pos, ''.join('\n' + imp for imp in imports)))
+
+        comp = self.find_component(content)
+        if self.remove_markers and comp:
+            starts = [content.find(marker) for marker in self.remove_markers]
+            start = next((s for s in starts if s != -1), -1)
+            if start > 0:
+                removed = (start, comp.start())
+                edits.append((start, comp.start(), '\n'))
+
+        if self.hook_code and comp:
+            brace = content.find('{', comp.start())
+            if brace != -1:
+                edits.append((brace + 1, brace + 1, self.hook_code))
+
+        if self.replace_re:
+            for m in self.replace_re.finditer(content):
+                if removed and m.start() < removed[1] and m.end() > removed[0]:
+                    continue
+                rule = self.replacements[int(m.lastgroup[1:])]
+                text = m.expand(rule['with']) if 'regex' in rule else rule['with']
+                edits.append((m.start(), m.end(), text))
+
+        if self.guard:
+            pos = 0
+            while True:
+                m = RETURN_RE.search(content, pos)
+                if not m or not removed or not (removed[0] <= m.start() < removed[1]):
+                    break
+                pos = removed[1]
+            if m:
+                edits.append((m.start(), m.start(), render_guard(self.guard, m.group(1))))
+
+        return splice(content, edits)
+
+def load_specs(spec_dir=SPEC_DIR, names=None):
+    """PageSpec per *.json in spec_dir (optionally only the given page names), sorted by name."""
+    specs = []
+    for path in sorted(glob.glob(os.path.join(spec_dir, '*.json'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if names and name not in names:
+            continue
+        with open(path, 'r') as f:
+            specs.append(PageSpec(name, json.load(f)))
+    return specs
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Propagate the snake_case renames from fix_schema.py to raw SQL and query strings.
+
+The rename index (camelCase -> snake_case) is built once, either from the
+JSON table written by `fix_schema.py --name-map` or by a dry run of the
+schema pass over the Drizzle modules. All old names are compiled into one
+trie-shaped regex, so every target file is rewritten in a single scan
+instead of one str.replace per name.
+
+  .sql files      every whole-identifier occurrence is renamed
+  .ts files       only the literal text of sql`...` / sql<T>`...` templates
+                  and of string-literal sql.raw(...) arguments is renamed;
+                  ${...} interpolations and ordinary code are left alone.
+                  sql.raw() calls built from expressions cannot be
+                  rewritten statically and are reported for manual review
+"""
+import argparse
+import glob
+import json
+import os
+import re
+
+from atomic_write import AtomicWriter
+from codemod import splice
+from fix_schema import rewrite_schema
+
+DEFAULT_TARGETS = [
+    "yokage-full-schema.sql",
+    "seed.sql",
+    "migrations/*.sql",
+    "server/**/*.ts",
+]
+
+# A sql tag followed by its template or by <type arguments> (matched by sql_templates)
+SQL_TAG_RE = re.compile(r'\bsql(?=[<`])')
+TEMPLATE_LITERAL_RE = re.compile(r'`(?:[^`\\]|\\.)*`', re.S)
+# sql.raw("...") / sql.raw('...') / sql.raw(`...`) with a literal first argument
+SQL_RAW_RE = re.compile(r"""\bsql\.raw\(\s*("(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\]|\\.)*`)""", re.S)
+SQL_RAW_CALL_RE = re.compile(r'\bsql\.raw\(')
+INTERPOLATION_RE = re.compile(r'\$\{[^}]*\}')
+
+def build_rename_index(name_map_path=None, schema_files=()):
+    """Collect {old: new} from a saved name map and/or a dry run over schema files."""
+    index = {}
+    if name_map_path:
+        with open(name_map_path, 'r') as f:
+            index.update(json.load(f))
+    for filepath in schema_files:
+        with open(filepath, 'r') as f:
+            _, changes = rewrite_schema(f.read())
+        index.update((c[1], c[2]) for c in changes)
+    return {old: new for old, new in index.items() if old != new}
+
+def _trie_pattern(words):
+    """Build a regex alternation shaped like a trie over words.
+
+    Shared prefixes are factored out (createdAt|createdBy -> created(?:At|By)),
+    so the regex engine walks each candidate position once, much like an
+    Aho-Corasick automaton, instead of retrying every name in turn.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        end = '' in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if end:
+            body = '(?:' + body + ')?'
+        return body
+
+    return emit(trie)
+
+def compile_matcher(index):
+    """Compile the rename index into one whole-identifier regex."""
+    if not index:
+        return None
+    return re.compile(r'(?<![A-Za-z0-9_])(?:' + _trie_pattern(index) + r')(?![A-Za-z0-9_])')
+
+def _type_args_end(content, pos):
+    """Offset just past the <...> type arguments opening at content[pos], or None.
+
+    Brackets are counted so nested generics (sql<Array<{ id: number }>>) are
+    skipped whole; the => of function types does not close one. Hitting a
+    backtick first means this was a comparison, not type arguments.
+    """
+    depth = 0
+    for i in range(pos, len(content)):
+        c = content[i]
+        if c == '<':
+            depth += 1
+        elif c == '>' and content[i - 1] != '=':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif c == '`':
+            return None
+    return None
+
+def sql_templates(content):
+    """(start, end) of the template literal of every sql`...` / sql<T>`...` tagged template."""
+    for m in SQL_TAG_RE.finditer(content):
+        pos = m.end()
+        if content[pos] == '<':
+            pos = _type_args_end(content, pos)
+            if pos is None:
+                continue
+        template = TEMPLATE_LITERAL_RE.match(content, pos)
+        if template:
+            yield template.span()
+
+class Propagator:
+    """Rewrites old identifiers to their new names in one scan per text."""
+
+    def __init__(self, index):
+        self.index = index
+        self.matcher = compile_matcher(index)
+        self.unhandled = []     # (filepath, line) of sql.raw() calls with a non-literal argument
+
+    def rewrite_text(self, text, counts):
+        if self.matcher is None:
+            return text
+
+        def repl(match):
+            old = match.group(0)
+            counts[old] = counts.get(old, 0) + 1
+            return self.index[old]
+
+        return self.matcher.sub(repl, text)
+
+    def rewrite_sql_template(self, template, counts):
+        # Rename only the literal parts; ${...} is JS and keeps its names.
+        chunks = []
+        last = 0
+        for match in INTERPOLATION_RE.finditer(template):
+            chunks.append(self.rewrite_text(template[last:match.start()], counts))
+            chunks.append(match.group(0))
+            last = match.end()
+        chunks.append(self.rewrite_text(template[last:], counts))
+        return ''.join(chunks)
+
+    def rewrite(self, filepath, content):
+        """Return (new_content, {old_name: count}) for one file."""
+        counts = {}
+        if filepath.endswith('.sql'):
+            return self.rewrite_text(content, counts), counts
+        literal_raw = {m.start() for m in SQL_RAW_RE.finditer(content)}
+        for m in SQL_RAW_CALL_RE.finditer(content):
+            if m.start() not in literal_raw:
+                self.unhandled.append((filepath, content.count('\n', 0, m.start()) + 1))
+
+        def repl(match):
+            # Keep the sql.raw( prefix, rename inside the literal only.
+            prefix = match.group(0)[:match.start(1) - match.start()]
+            return prefix + self.rewrite_sql_template(match.group(1), counts)
+
+        new_content = splice(content, [(start, end, self.rewrite_sql_template(content[start:end], counts))
+                                       for start, end in sql_templates(content)])
+        new_content = SQL_RAW_RE.sub(repl, new_content)
+        return new_content, counts
+
+def expand_targets(patterns):
+    files = []
+    seen = set()
+    for pattern in patterns:
+        for filepath in sorted(glob.glob(pattern, recursive=True)):
+            if filepath not in seen and os.path.isfile(filepath):
+                seen.add(filepath)
+                files.append(filepath)
+    return files
+
+def propagate(files, propagator, dry_run=False):
+    total = 0
+    writer = AtomicWriter()
+    for filepath in files:
+        with open(filepath, 'r') as f:
+            content = f.read()
+        new_content, counts = propagator.rewrite(filepath, content)
+        if not counts:
+            continue
+        n = sum(counts.values())
+        total += n
+        if not dry_run:
+            writer.write(filepath, new_content)
+        print(f"{'Would fix' if dry_run else 'Fixed'} {filepath}: {n} renames")
+        for old in sorted(counts):
+            print(f"  {old} -> {propagator.index[old]} ({counts[old]})")
+    writer.flush()
+    for filepath, line in propagator.unhandled:
+        print(f"  WARNING: {filepath}:{line}: sql.raw() with a computed argument; check its SQL by hand")
+    return total
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('targets', nargs='*', help='files or globs to rewrite (default: SQL files and server/**/*.ts)')
+    parser.add_argument('--name-map', help='JSON rename table written by fix_schema.py --name-map')
+    parser.add_argument('--schema', nargs='*', default=[],
+                        help='derive renames from a dry run over these Drizzle schema files')
+    parser.add_argument('--dry-run', action='store_true', help='report renames without writing files')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = build_rename_index(args.name_map, args.schema)
+    print(f"Rename index: {len(index)} names")
+    files = expand_targets(args.targets or DEFAULT_TARGETS)
+    total = propagate(files, Propagator(index), dry_run=args.dry_run)
+    print(f"\nTotal renames: {total}")
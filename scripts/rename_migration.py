@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Turn fix_schema.py renames into a drizzle-kit migration that renames in place.
+
+fix_schema.py changes DB names in the Drizzle modules but not in
+drizzle/meta, so drizzle-kit compares the new schema with a snapshot that
+still has the old names and generates DROP COLUMN / ADD COLUMN (and
+DROP TABLE / CREATE TABLE) pairs. On large tables that is a data-losing
+rewrite; RENAME is a catalog-only change.
+
+This reads the latest snapshot named in drizzle/meta/_journal.json without
+decoding all of it: one string-aware scan records where each table and
+enum sits in the file, and only entries whose raw text mentions a renamed
+name are parsed. For those it emits
+
+  ALTER TABLE "old" RENAME TO "new";
+  ALTER TABLE "t" RENAME COLUMN "old" TO "new";
+  ALTER TYPE "public"."old" RENAME TO "new";
+
+as drizzle/<NNNN>_<name>.sql, and writes the next snapshot (the previous
+one with only the changed entries replaced) plus its journal entry, so
+drizzle-kit sees the schema and snapshot in agreement afterwards. The
+renames come from fix_schema.py's --name-map table, its --report output,
+or a dry run of the schema pass:
+
+  python scripts/fix_schema.py --all --name-map renames.json
+  python scripts/rename_migration.py --name-map renames.json
+  python scripts/rename_migration.py --report /tmp/fix_schema.json --dry-run
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import time
+import uuid
+
+from atomic_write import AtomicWriter
+from codemod import splice
+from propagate_renames import build_rename_index, compile_matcher
+
+DRIZZLE_DIR = "drizzle"
+JOURNAL = os.path.join("meta", "_journal.json")
+BREAKPOINT = "--> statement-breakpoint"
+
+JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],:]')
+
+def members(text, start):
+    """(key, key_start, value_start, value_end) for each member of the object opening at text[start].
+
+    Nested values are skipped over without being decoded.
+    """
+    depth = 0
+    key = key_start = value_start = None
+    for m in JSON_TOKEN_RE.finditer(text, start):
+        tok = m.group(0)
+        if depth == 1:
+            if tok[0] == '"' and value_start is None:
+                key, key_start = json.loads(tok), m.start()
+                continue
+            if tok == ':':
+                value_start = m.end()
+                continue
+            if tok in ',}':
+                if key is not None:
+                    end = m.start()
+                    while text[end - 1].isspace():
+                        end -= 1
+                    while text[value_start].isspace():
+                        value_start += 1
+                    yield key, key_start, value_start, end
+                if tok == '}':
+                    return
+                key = key_start = value_start = None
+                continue
+        if tok in '{[':
+            depth += 1
+        elif tok in '}]':
+            depth -= 1
+
+class LazySnapshot:
+    """A drizzle-kit snapshot whose tables and enums are decoded on demand."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r') as f:
+            self.text = f.read()
+        self.root = {key: (ks, vs, ve) for key, ks, vs, ve in members(self.text, self.text.index('{'))}
+        self._sections = {}
+
+    def value(self, key):
+        _, start, end = self.root[key]
+        return json.loads(self.text[start:end])
+
+    def section(self, name):
+        """{key: (key_start, value_start, value_end)} for the entries of "tables" or "enums"."""
+        if name not in self._sections:
+            _, start, _ = self.root[name]
+            self._sections[name] = {key: (ks, vs, ve) for key, ks, vs, ve in members(self.text, start)}
+        return self._sections[name]
+
+    def raw(self, span):
+        return self.text[span[1]:span[2]]
+
+    def matching(self, name, matcher):
+        """Decoded entries of a section whose raw text mentions a renamed name."""
+        found = {}
+        for key, span in self.section(name).items():
+            if matcher.search(self.raw(span)):
+                found[key] = json.loads(self.raw(span))
+        return found
+
+def _rename_list(names, renames):
+    return [renames.get(n, n) for n in names]
+
+def rename_table(table, renames):
+    """Apply renames to one snapshot table; returns (table, [(old, new)] column renames)."""
+    columns = {}
+    renamed = []
+    for key, col in table['columns'].items():
+        new = renames.get(key)
+        if new and new != key and new not in table['columns']:
+            renamed.append((key, new))
+            key = new
+        columns[key] = dict(col, name=key)
+        if col.get('typeSchema') is not None and col['type'] in renames:
+            columns[key]['type'] = renames[col['type']]
+    table = copy.deepcopy(dict(table, name=renames.get(table['name'], table['name']), columns=columns))
+    for index in table.get('indexes', {}).values():
+        for col in index.get('columns', []):
+            if not col.get('isExpression'):
+                col['expression'] = renames.get(col['expression'], col['expression'])
+    for fk in table.get('foreignKeys', {}).values():
+        fk['tableFrom'] = renames.get(fk['tableFrom'], fk['tableFrom'])
+        fk['tableTo'] = renames.get(fk['tableTo'], fk['tableTo'])
+        fk['columnsFrom'] = _rename_list(fk['columnsFrom'], renames)
+        fk['columnsTo'] = _rename_list(fk['columnsTo'], renames)
+    for key in ('compositePrimaryKeys', 'uniqueConstraints'):
+        for constraint in table.get(key, {}).values():
+            constraint['columns'] = _rename_list(constraint['columns'], renames)
+    return table, renamed
+
+def _qualified(schema, name):
+    return f'"{schema}"."{name}"' if schema else f'"{name}"'
+
+def plan(snapshot, renames):
+    """Rename statements and snapshot edits for every entry that mentions a renamed name."""
+    matcher = compile_matcher(renames)
+    table_sql, column_sql, enum_sql = [], [], []
+    edits = []
+    if matcher is None:
+        return [], edits
+    for key, table in snapshot.matching('tables', matcher).items():
+        new_table, renamed = rename_table(table, renames)
+        schema = table.get('schema') or ''
+        if new_table['name'] != table['name']:
+            table_sql.append(f'ALTER TABLE {_qualified(schema, table["name"])} RENAME TO "{new_table["name"]}";')
+        for old, new in renamed:
+            column_sql.append(f'ALTER TABLE {_qualified(schema, new_table["name"])} RENAME COLUMN "{old}" TO "{new}";')
+        if new_table != table:
+            new_key = f'{schema or "public"}.{new_table["name"]}'
+            edits.append((key, new_key, new_table))
+    for key, enum in snapshot.matching('enums', matcher).items():
+        new_name = renames.get(enum['name'])
+        if new_name and new_name != enum['name']:
+            enum_sql.append(f'ALTER TYPE {_qualified(enum["schema"], enum["name"])} RENAME TO "{new_name}";')
+            edits.append((key, f'{enum["schema"]}.{new_name}', dict(enum, name=new_name)))
+    # Types first so renamed columns keep resolving, tables before the columns named by their new table.
+    return enum_sql + table_sql + column_sql, edits
+
+def _member(key, value, indent):
+    body = json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + indent)
+    return f'{json.dumps(key)}: {body}'
+
+def next_snapshot(snapshot, edits, snapshot_id):
+    """The snapshot text with only the edited entries re-serialized."""
+    spans = {**snapshot.section('tables'), **snapshot.section('enums')}
+    changes = []
+    for key, new_key, value in edits:
+        ks, _, ve = spans[key]
+        line_start = snapshot.text.rfind('\n', 0, ks) + 1
+        changes.append((ks, ve, _member(new_key, value, snapshot.text[line_start:ks])))
+    prev_id = snapshot.value('id')
+    for key, value in (('id', snapshot_id), ('prevId', prev_id)):
+        _, start, end = snapshot.root[key]
+        changes.append((start, end, json.dumps(value)))
+    return splice(snapshot.text, changes)
+
+def load_journal(drizzle_dir):
+    with open(os.path.join(drizzle_dir, JOURNAL), 'r') as f:
+        return json.load(f)
+
+def load_report_renames(path):
+    """{old: new} from a fix_schema.py --report JSON file."""
+    with open(path, 'r') as f:
+        return {r['old']: r['new'] for r in json.load(f)['renames'] if r['old'] != r['new']}
+
+def render_migration(statements):
+    return ''.join(f'{s}{BREAKPOINT}\n' for s in statements[:-1]) + (statements[-1] + '\n' if statements else '')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--name-map', help='rename table written by fix_schema.py --name-map')
+    parser.add_argument('--report', help='JSON report written by fix_schema.py --report')
+    parser.add_argument('--schema', nargs='*', default=[],
+                        help='Drizzle modules to dry-run fix_schema over for further renames')
+    parser.add_argument('--drizzle-dir', default=DRIZZLE_DIR, help='drizzle-kit output directory (with meta/)')
+    parser.add_argument('--name', default='snake_case_renames', help='migration name suffix')
+    parser.add_argument('--dry-run', action='store_true', help='print the migration without writing anything')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    renames = build_rename_index(args.name_map, args.schema)
+    if args.report:
+        renames.update(load_report_renames(args.report))
+    if not renames:
+        raise SystemExit("No renames given: pass --name-map, --report or --schema")
+
+    journal = load_journal(args.drizzle_dir)
+    last = journal['entries'][-1]
+    snapshot_path = os.path.join(args.drizzle_dir, 'meta', f"{last['idx']:04d}_snapshot.json")
+    t0 = time.perf_counter()
+    snapshot = LazySnapshot(snapshot_path)
+    statements, edits = plan(snapshot, renames)
+    entries = len(snapshot.section('tables')) + len(snapshot.section('enums'))
+    print(f"{snapshot_path}: {len(edits)} of {entries} tables/enums touched by {len(renames)} renames "
+          f"({time.perf_counter() - t0:.3f}s)")
+    if not statements:
+        print("Snapshot already matches the renames; no migration needed.")
+        raise SystemExit(0)
+
+    sql = render_migration(statements)
+    if args.dry_run:
+        print(sql)
+        raise SystemExit(0)
+
+    idx = last['idx'] + 1
+    tag = f"{idx:04d}_{args.name}"
+    journal['entries'].append({'idx': idx, 'version': last['version'], 'when': int(time.time() * 1000),
+                               'tag': tag, 'breakpoints': True})
+    with AtomicWriter() as writer:
+        writer.write(os.path.join(args.drizzle_dir, f"{tag}.sql"), sql)
+        writer.write(os.path.join(args.drizzle_dir, 'meta', f"{idx:04d}_snapshot.json"),
+                     next_snapshot(snapshot, edits, str(uuid.uuid4())))
+        writer.write(os.path.join(args.drizzle_dir, JOURNAL), json.dumps(journal, indent=2))
+    print(f"Wrote {args.drizzle_dir}/{tag}.sql ({len(statements)} statements) and meta/{idx:04d}_snapshot.json")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Detect drift between the Drizzle schema and the hand-written SQL schema.
+
+Both sides are parsed into the same normalized catalog:
+
+  {table: {column: (type, not_null)}}
+
+Each table is reduced to a fingerprint (sha256 of its sorted columns) and
+only tables whose fingerprints differ are diffed column by column, so a
+full-schema comparison stays well under a second.
+
+Names are compared after camel_to_snake() by default, because
+yokage-full-schema.sql still uses the pre-migration camelCase names; pass
+--exact-names to compare them verbatim.
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+
+from atomic_write import write_file
+from fix_schema import TYPE_FUNCS, camel_to_snake
+
+# export const users = pgTable("users", {
+TS_TABLE_RE = re.compile(r'pgTable\((["\'])([a-zA-Z_]+)\1\s*,\s*\{')
+# field: varchar("db_name", { length: 64 }).notNull()
+TS_COLUMN_RE = re.compile(
+    rf'^\s*\w+\s*:\s*({TYPE_FUNCS}|\w+Enum)\((["\'])([a-zA-Z_]+)\2\s*(?:,\s*(\{{[^}}]*\}}))?\)(.*)$'
+)
+TS_OPTION_RE = re.compile(r'(\w+)\s*:\s*(["\']?)([\w.]+)\2')
+
+# CREATE TABLE IF NOT EXISTS "users" (
+SQL_TABLE_RE = re.compile(r'^CREATE TABLE (?:IF NOT EXISTS )?"?(\w+)"?\s*\(\s*$', re.I)
+SQL_COLUMN_RE = re.compile(r'^\s*"?(\w+)"?\s+(.+?),?\s*$')
+SQL_TYPE_END_RE = re.compile(
+    r'\s+(?:NOT\b|NULL\b|DEFAULT\b|PRIMARY\b|UNIQUE\b|REFERENCES\b|CHECK\b|GENERATED\b|CONSTRAINT\b|COLLATE\b)',
+    re.I,
+)
+SQL_CONSTRAINT_WORDS = {'CONSTRAINT', 'PRIMARY', 'UNIQUE', 'FOREIGN', 'CHECK', 'EXCLUDE'}
+
+TYPE_ALIASES = {
+    'int': 'integer',
+    'int4': 'integer',
+    'bool': 'boolean',
+    'decimal': 'numeric',
+    'timestamptz': 'timestamp with time zone',
+    'timestamp without time zone': 'timestamp',
+    'character varying': 'varchar',
+}
+
+def normalize_type(raw):
+    """Canonical lower-case type string: 'VARCHAR(64)' -> 'varchar(64)'."""
+    t = re.sub(r'\s+', ' ', raw.strip().lower())
+    t = re.sub(r'\s*\(\s*', '(', t)
+    t = re.sub(r'\s*,\s*', ',', t)
+    t = re.sub(r'\s*\)', ')', t)
+    base, _, args = t.partition('(')
+    base = TYPE_ALIASES.get(base, base)
+    return f"{base}({args}" if args else base
+
+def ts_column_type(func, options):
+    opts = dict((k, v) for k, _, v in TS_OPTION_RE.findall(options or ''))
+    if func.endswith('Enum'):
+        return 'enum'
+    if func == 'varchar' and 'length' in opts:
+        return f"varchar({opts['length']})"
+    if func == 'decimal':
+        if 'precision' in opts:
+            return f"numeric({opts['precision']},{opts.get('scale', '0')})"
+        return 'numeric'
+    if func == 'timestamp' and opts.get('withTimezone') == 'true':
+        return 'timestamp with time zone'
+    if func == 'vector' and 'dimensions' in opts:
+        return f"vector({opts['dimensions']})"
+    return normalize_type(func)
+
+def parse_drizzle(paths, name_key):
+    """Parse pgTable declarations into {table: {column: (type, not_null)}}."""
+    catalog = {}
+    for path in paths:
+        table = None
+        with open(path, 'r') as f:
+            for line in f:
+                match = TS_TABLE_RE.search(line)
+                if match:
+                    table = catalog.setdefault(name_key(match.group(2)), {})
+                    continue
+                if table is None:
+                    continue
+                if line.startswith('}'):
+                    table = None
+                    continue
+                col = TS_COLUMN_RE.match(line)
+                if col:
+                    func, _, name, options, rest = col.groups()
+                    not_null = '.notNull()' in rest or '.primaryKey()' in rest or func == 'serial'
+                    table[name_key(name)] = (ts_column_type(func, options), not_null)
+    return catalog
+
+def parse_sql(path, name_key):
+    """Parse CREATE TABLE blocks into {table: {column: (type, not_null)}}."""
+    catalog = {}
+    table = None
+    with open(path, 'r') as f:
+        for line in f:
+            if table is None:
+                match = SQL_TABLE_RE.match(line.strip())
+                if match:
+                    table = catalog.setdefault(name_key(match.group(1)), {})
+                continue
+            stripped = line.strip()
+            if stripped.startswith(')'):
+                table = None
+                continue
+            if not stripped or stripped.startswith('--'):
+                continue
+            if stripped.split(None, 1)[0].upper() in SQL_CONSTRAINT_WORDS:
+                continue
+            col = SQL_COLUMN_RE.match(line)
+            if not col:
+                continue
+            name, rest = col.groups()
+            end = SQL_TYPE_END_RE.search(rest)
+            raw_type = rest[:end.start()] if end else rest
+            upper = rest.upper()
+            if ' CHECK ' in f" {upper} " and ' IN ' in upper and raw_type.strip().lower() == 'text':
+                sql_type = 'enum'
+            else:
+                sql_type = normalize_type(raw_type)
+            not_null = 'NOT NULL' in upper or 'PRIMARY KEY' in upper or sql_type in ('serial', 'bigserial')
+            table[name_key(name)] = (sql_type, not_null)
+    return catalog
+
+def fingerprint(columns):
+    payload = json.dumps(sorted(columns.items()), separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def diff_catalogs(left, right):
+    """Diff two catalogs, only descending into tables whose fingerprints differ."""
+    left_prints = {t: fingerprint(cols) for t, cols in left.items()}
+    right_prints = {t: fingerprint(cols) for t, cols in right.items()}
+    result = {
+        'only_left': sorted(set(left) - set(right)),
+        'only_right': sorted(set(right) - set(left)),
+        'changed': {},
+    }
+    for table in sorted(set(left) & set(right)):
+        if left_prints[table] == right_prints[table]:
+            continue
+        lcols, rcols = left[table], right[table]
+        result['changed'][table] = {
+            'only_left': sorted(set(lcols) - set(rcols)),
+            'only_right': sorted(set(rcols) - set(lcols)),
+            'different': {
+                c: {'left': list(lcols[c]), 'right': list(rcols[c])}
+                for c in sorted(set(lcols) & set(rcols)) if lcols[c] != rcols[c]
+            },
+        }
+    return result
+
+def print_drift(result, left_label, right_label):
+    for table in result['only_left']:
+        print(f"Table only in {left_label}: {table}")
+    for table in result['only_right']:
+        print(f"Table only in {right_label}: {table}")
+    for table, d in result['changed'].items():
+        print(f"Table {table}:")
+        for c in d['only_left']:
+            print(f"  column only in {left_label}: {c}")
+        for c in d['only_right']:
+            print(f"  column only in {right_label}: {c}")
+        for c, v in d['different'].items():
+            print(f"  {c}: {left_label}={v['left'][0]}{' not null' if v['left'][1] else ''}"
+                  f" / {right_label}={v['right'][0]}{' not null' if v['right'][1] else ''}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--drizzle', nargs='+', default=['drizzle/schema.ts'], help='Drizzle schema modules')
+    parser.add_argument('--sql', default='yokage-full-schema.sql', help='SQL schema file')
+    parser.add_argument('--exact-names', action='store_true', help='do not normalize names to snake_case')
+    parser.add_argument('--json', help='write the drift result as JSON to this path')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 when any drift is found')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    name_key = (lambda n: n) if args.exact_names else camel_to_snake
+    drizzle = parse_drizzle(args.drizzle, name_key)
+    sql = parse_sql(args.sql, name_key)
+    print(f"Drizzle: {len(drizzle)} tables, SQL: {len(sql)} tables")
+    result = diff_catalogs(drizzle, sql)
+    print_drift(result, 'drizzle', 'sql')
+    if args.json:
+        write_file(args.json, json.dumps(result, indent=2) + '\n')
+    drift = len(result['only_left']) + len(result['only_right']) + len(result['changed'])
+    print(f"\nTables with drift: {drift}")
+    if args.check and drift:
+        sys.exit(1)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Bulk-load seed data with COPY FROM STDIN instead of row-by-row INSERTs.
+
+Sources are SQL seed scripts (seed.sql, migrations/seed_unified.sql) and/or
+a directory of CSV fixtures named <table>.csv with a header row.
+
+SQL scripts are split into statements and each INSERT ... VALUES is parsed.
+Rows made only of literals are buffered per (table, columns) and streamed
+through COPY from an in-memory buffer. Statements that cannot be expressed
+as COPY (currval(), sub-selects, ON CONFLICT, CREATE TABLE, ...) run
+unchanged, and buffered rows are flushed before each of them so file order
+is preserved.
+
+Every flush loads each table in its own transaction on a pooled connection.
+Tables are grouped into levels by their foreign keys, and the tables in
+one level are loaded in parallel.
+
+  python scripts/seed_db.py seed.sql migrations/seed_unified.sql
+  python scripts/seed_db.py --csv fixtures/load-test -j 8
+  python scripts/seed_db.py --plan seed.sql          # parse only, no database
+"""
+import argparse
+import csv
+import glob
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_conn import close_pool, connect, get_dsn, get_pool, pooled_connection
+
+INSERT_RE = re.compile(
+    r'^INSERT\s+INTO\s+((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)\s*\(([^)]*)\)\s*VALUES\s*',
+    re.I | re.S,
+)
+NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+# A literal may carry a harmless cast: '{"a":1}'::jsonb
+CAST_RE = re.compile(r'::\s*\w+(?:\s*\[\])?')
+LEADING_COMMENTS_RE = re.compile(r'^(?:\s*--[^\n]*(?:\n|$))*')
+# Plain statements that read the session's sequence state need the rows
+# before them to be inserted on the same connection.
+SESSION_STATE_RE = re.compile(r'\b(?:currval|lastval)\s*\(', re.I)
+KEYWORD_LITERALS = {'null': None, 'true': 't', 'false': 'f'}
+
+FK_SQL = """
+    SELECT c.conrelid::regclass::text, c.confrelid::regclass::text
+    FROM pg_constraint c
+    WHERE c.contype = 'f' AND c.conrelid <> c.confrelid;
+"""
+
+def split_statements(sql):
+    """Split a SQL script on top-level semicolons.
+
+    Quotes, double-quoted identifiers, dollar-quoted bodies and comments
+    are skipped over, so semicolons inside them do not split. Leading
+    comment lines are stripped and comment-only chunks are dropped.
+    """
+    statements = []
+    start = 0
+    i = 0
+    n = len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == "'" or ch == '"':
+            i += 1
+            while i < n:
+                if sql[i] == ch:
+                    if i + 1 < n and sql[i + 1] == ch:
+                        i += 2
+                        continue
+                    break
+                i += 1
+        elif sql.startswith('--', i):
+            nl = sql.find('\n', i)
+            i = n if nl == -1 else nl
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 1
+        elif ch == '$':
+            tag = re.match(r'\$\w*\$', sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                i = n if end == -1 else end + len(tag.group(0)) - 1
+        elif ch == ';':
+            statements.append(sql[start:i])
+            start = i + 1
+        i += 1
+    statements.append(sql[start:])
+    result = []
+    for stmt in statements:
+        stmt = LEADING_COMMENTS_RE.sub('', stmt).strip()
+        if stmt:
+            result.append(stmt)
+    return result
+
+def _unquote_ident(name):
+    return '.'.join(part.strip('"') for part in re.findall(r'"[^"]+"|\w+', name))
+
+def _parse_literal(text, i):
+    """Parse one literal at text[i:]; returns (value, next_index) or raises ValueError."""
+    if text[i] == "'":
+        j = i + 1
+        chunks = []
+        while True:
+            k = text.find("'", j)
+            if k == -1:
+                raise ValueError('unterminated string')
+            chunks.append(text[j:k])
+            if text.startswith("''", k):
+                chunks.append("'")
+                j = k + 2
+                continue
+            i = k + 1
+            break
+        value = ''.join(chunks)
+    else:
+        m = NUMBER_RE.match(text, i)
+        word = re.match(r'[A-Za-z_]+', text[i:])
+        if m:
+            value, i = m.group(0), m.end()
+        elif word and word.group(0).lower() in KEYWORD_LITERALS:
+            value, i = KEYWORD_LITERALS[word.group(0).lower()], i + word.end()
+        else:
+            raise ValueError('not a literal')
+    cast = CAST_RE.match(text, i)
+    if cast:
+        i = cast.end()
+    return value, i
+
+def _skip_ws(text, i):
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i
+
+def parse_values(text):
+    """Parse `(lit, ...), (lit, ...)` into rows; None if anything is not a literal."""
+    rows = []
+    i = _skip_ws(text, 0)
+    try:
+        while i < len(text):
+            if text[i] != '(':
+                return None
+            i += 1
+            row = []
+            while True:
+                i = _skip_ws(text, i)
+                value, i = _parse_literal(text, i)
+                row.append(value)
+                i = _skip_ws(text, i)
+                if text[i] == ',':
+                    i += 1
+                    continue
+                if text[i] == ')':
+                    i += 1
+                    break
+                return None
+            rows.append(row)
+            i = _skip_ws(text, i)
+            if i < len(text) and text[i] == ',':
+                i = _skip_ws(text, i + 1)
+            elif i < len(text):
+                return None     # ON CONFLICT, RETURNING, ...
+    except (ValueError, IndexError):
+        return None
+    return rows
+
+def parse_insert(stmt):
+    """Return (table, columns, rows) for a literal-only INSERT, else None."""
+    m = INSERT_RE.match(stmt)
+    if not m:
+        return None
+    columns = tuple(_unquote_ident(c.strip()) for c in m.group(2).split(','))
+    rows = parse_values(stmt[m.end():])
+    if not rows or any(len(r) != len(columns) for r in rows):
+        return None
+    return _unquote_ident(m.group(1)), columns, rows
+
+def copy_escape(value):
+    """Render one value in COPY text format."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def build_plan(paths):
+    """Turn SQL scripts into an ordered plan of ('copy', batch) / ('sql', stmt) steps.
+
+    A batch maps (table, columns) -> list of rows and holds every copyable
+    INSERT between two statements that have to run as-is.
+    """
+    plan = []
+    batch = {}
+    for path in paths:
+        with open(path, 'r') as f:
+            statements = split_statements(f.read())
+        for stmt in statements:
+            parsed = parse_insert(stmt)
+            if parsed:
+                table, columns, rows = parsed
+                batch.setdefault((table, columns), []).extend(rows)
+                continue
+            if batch:
+                plan.append(('copy', batch))
+                batch = {}
+            plan.append(('sql', stmt))
+    if batch:
+        plan.append(('copy', batch))
+    return plan
+
+def fk_levels(tables, edges):
+    """Group tables into load levels so referenced tables load first.
+
+    edges is [(child, parent)]. Tables in a cycle end up together in the
+    last level.
+    """
+    tables = list(tables)
+    deps = {t: {p for c, p in edges if c == t and p in tables and p != t} for t in tables}
+    levels = []
+    done = set()
+    while len(done) < len(tables):
+        level = [t for t in tables if t not in done and deps[t] <= done]
+        if not level:
+            level = [t for t in tables if t not in done]
+        levels.append(level)
+        done.update(level)
+    return levels
+
+def load_fk_edges(conn):
+    with conn.cursor() as cur:
+        cur.execute(FK_SQL)
+        edges = [(_unquote_ident(c), _unquote_ident(p)) for c, p in cur.fetchall()]
+    conn.rollback()
+    return edges
+
+def copy_rows(conn, table, columns, rows):
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(copy_escape(v) for v in row))
+        buf.write('\n')
+    buf.seek(0)
+    return copy_stream(conn, table, columns, buf)
+
+def copy_stream(conn, table, columns, stream, options=""):
+    """COPY stream into table; returns the number of rows loaded."""
+    target = '.'.join(f'"{p}"' for p in table.split('.'))
+    cols = ', '.join(f'"{c}"' for c in columns)
+    with conn.cursor() as cur:
+        cur.copy_expert(f"COPY {target} ({cols}) FROM STDIN {options}", stream)
+        return cur.rowcount
+
+def load_table(dsn, table, jobs, conn=None):
+    """Load every (columns, rows) group or CSV file for one table in one transaction.
+
+    Uses a pooled connection unless conn is given.
+    """
+    if conn is None:
+        with pooled_connection(dsn) as pooled:
+            return load_table(dsn, table, jobs, pooled)
+    t0 = time.perf_counter()
+    count = 0
+    try:
+        for columns, source in jobs:
+            if isinstance(source, str):
+                with open(source, 'r', newline='') as f:
+                    count += copy_stream(conn, table, columns, f, "WITH (FORMAT csv, HEADER true)")
+            else:
+                count += copy_rows(conn, table, columns, source)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return table, count, time.perf_counter() - t0
+
+def load_batch(dsn, batch, edges, workers, conn=None):
+    """Load one batch: FK levels in order, tables within a level in parallel.
+
+    With conn, tables are loaded one after another on that connection instead.
+    """
+    by_table = {}
+    for (table, columns), source in batch.items():
+        by_table.setdefault(table, []).append((columns, source))
+    results = []
+    if conn is not None:
+        for level in fk_levels(by_table, edges):
+            results.extend(load_table(dsn, t, by_table[t], conn) for t in level)
+        return results
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for level in fk_levels(by_table, edges):
+            results.extend(executor.map(lambda t: load_table(dsn, t, by_table[t]), level))
+    return results
+
+def needs_session(plan, index):
+    """True when a plain statement after plan[index] reads session sequence state."""
+    return any(kind == 'sql' and SESSION_STATE_RE.search(step) for kind, step in plan[index + 1:])
+
+def csv_batch(directory):
+    """One batch of CSV fixtures: <table>.csv with the column list in the header."""
+    batch = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        with open(path, 'r', newline='') as f:
+            header = next(csv.reader(f))
+        table = os.path.splitext(os.path.basename(path))[0]
+        batch[(table, tuple(header))] = path
+    return batch
+
+def print_plan(plan):
+    for kind, step in plan:
+        if kind == 'sql':
+            print(f"  SQL   {' '.join(step.split())[:90]}")
+        else:
+            for (table, columns), rows in step.items():
+                n = len(rows) if not isinstance(rows, str) else 'csv'
+                print(f"  COPY  {table} ({len(columns)} columns): {n} rows")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scripts', nargs='*', help='SQL seed scripts, in load order')
+    parser.add_argument('--csv', help='directory of <table>.csv fixtures (loaded after the scripts)')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='tables loaded in parallel (default: 4)')
+    parser.add_argument('--plan', action='store_true', help='print the load plan without connecting')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    plan = build_plan(args.scripts)
+    if args.csv:
+        plan.append(('copy', csv_batch(args.csv)))
+    print(f"Load plan: {sum(k == 'copy' for k, _ in plan)} COPY batches, "
+          f"{sum(k == 'sql' for k, _ in plan)} plain statements")
+    if args.plan:
+        print_plan(plan)
+        sys.exit(0)
+
+    dsn = get_dsn()
+    # A single COPY of a large fixture (millions of rows) outlasts db_conn's
+    # default statement_timeout, so the load runs without one.
+    conn = connect(dsn, statement_timeout_ms=0)
+    edges = load_fk_edges(conn)
+    get_pool(dsn, minconn=1, maxconn=args.jobs, statement_timeout_ms=0)
+    t0 = time.perf_counter()
+    total = 0
+    try:
+        for index, (kind, step) in enumerate(plan):
+            if kind == 'sql':
+                with conn.cursor() as cur:
+                    cur.execute(step)
+                conn.commit()
+                continue
+            # currval()/lastval() later on must see these inserts' nextval() calls
+            shared = conn if needs_session(plan, index) else None
+            for table, count, seconds in load_batch(dsn, step, edges, args.jobs, shared):
+                total += count
+                print(f"  {table:<40} {count:>9} rows {seconds * 1000:>9.1f} ms")
+    finally:
+        close_pool()
+        conn.close()
+    print(f"\nSeeded {total} rows via COPY in {time.perf_counter() - t0:.2f}s")
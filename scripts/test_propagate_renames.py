@@ -0,0 +1,31 @@
+"""Tests for the sql template matching in propagate_renames.py (run with pytest)."""
+from propagate_renames import Propagator
+
+INDEX = {'createdAt': 'created_at', 'organizationId': 'organization_id'}
+
+def rewrite(content):
+    return Propagator(INDEX).rewrite('server/db.ts', content)
+
+def test_plain_and_generic_templates():
+    content, counts = rewrite('const a = sql`"createdAt"`;\nconst b = sql<Date>`max("createdAt")`;\n')
+    assert content == 'const a = sql`"created_at"`;\nconst b = sql<Date>`max("created_at")`;\n'
+    assert counts == {'createdAt': 2}
+
+def test_nested_generic_templates():
+    content, _ = rewrite('sql<Array<{ id: number; createdAt: Date }>>`SELECT "createdAt" FROM t`')
+    assert content == 'sql<Array<{ id: number; createdAt: Date }>>`SELECT "created_at" FROM t`'
+    content, _ = rewrite('sql<Map<string, Array<number>>>`"organizationId"`')
+    assert content == 'sql<Map<string, Array<number>>>`"organization_id"`'
+    content, _ = rewrite('sql<(row: Row) => Date>`"createdAt"`')
+    assert content == 'sql<(row: Row) => Date>`"created_at"`'
+
+def test_interpolations_and_code_are_left_alone():
+    source = 'if (sql < createdAt) { x = `createdAt`; }\nsql`"createdAt" = ${createdAt}`'
+    content, _ = rewrite(source)
+    assert content == 'if (sql < createdAt) { x = `createdAt`; }\nsql`"created_at" = ${createdAt}`'
+
+def test_sql_raw_literals_and_dynamic_calls():
+    propagator = Propagator(INDEX)
+    content, _ = propagator.rewrite('server/db.ts', 'sql.raw("createdAt");\nsql.raw(column);\n')
+    assert content == 'sql.raw("created_at");\nsql.raw(column);\n'
+    assert propagator.unhandled == [('server/db.ts', 2)]